@@ -1,4 +1,5 @@
 """Initialize the Flask web application."""
+import atexit
 import logging
 from typing import Dict, Any, Optional
 from flask import Flask, request, redirect, url_for, flash, current_app,\
@@ -15,12 +16,13 @@ from app.routes import upload
 from app.routes import library
 from app.routes import api
 from app import errors
-from app.commands import user_cli, translate_cli
+from app.commands import user_cli, translate_cli, upload_cli
 from app.utils.utils import Url
-from app.models.user import User, Invitation, LoginLog, InvitationState
-from app.models.location import Bookmarks, Location, Category
-from app.models.event import EventLog
-from app.models.message import Thread
+from app.models.user import User, last_seen_buffer
+from app.models.location import Bookmarks, Category
+from app.models.alerts import get_alerts
+from app.models.event import event_sink
+from app.models.upload import image_processor, get_srcset_attr
 from app.extensions import db, migrate, login_manager, bcrypt, babel, misaka,\
     mail, moment
 
@@ -76,6 +78,7 @@ def create_app(config_object: str = 'app.config.Config') -> Flask:
     # register custom flask commands
     app.cli.add_command(user_cli)
     app.cli.add_command(translate_cli)
+    app.cli.add_command(upload_cli)
 
     # modify jinja2 environment
     app.jinja_env.trim_blocks = True
@@ -88,9 +91,24 @@ def create_app(config_object: str = 'app.config.Config') -> Flask:
     # register functions to be called before each request
     register_before_requests(app)
 
+    # store buffered data on shutdown
+    atexit.register(flush_buffers, app)
+
     return app
 
 
+def flush_buffers(app: Flask) -> None:
+    """Stores data buffered in memory to database.
+
+    Args:
+        app: Flask application object to store the data for
+    """
+    image_processor.shutdown()
+    with app.app_context():
+        last_seen_buffer.flush()
+        event_sink.flush()
+
+
 def register_template_context(app: Flask) -> None:
     """Registers additional global Jinja2 functions and variables."""
     @app.context_processor
@@ -98,41 +116,34 @@ def register_template_context(app: Flask) -> None:
         """Registers endpoints relation helpers."""
         return dict(Url=Url)
 
+    @app.context_processor
+    def jinja_uploads():
+        """Registers helpers for showing uploaded images."""
+        return dict(srcset=get_srcset_attr)
+
     @app.context_processor
     def jinja_user_bookmarks():
         """Registers list of user bookmarks."""
         bookmarks = []
         if current_user.is_authenticated:
-            bookmarks = Bookmarks.get_by_user(current_user).all()
+            bookmarks = Bookmarks.get_list(current_user)
         return dict(user_bookmarks=bookmarks)
 
     @app.context_processor
     def jinja_categories():
-        """Registers list of user bookmarks."""
+        """Registers list of categories."""
         categories = []
         if current_user.is_authenticated:
-            categories = Category.get().all()
+            categories = Category.get_list()
         return dict(categories=categories)
 
     @app.context_processor
     def jinja_alerts_count():
         """Registers count of various alerts events."""
-        msg = 0
-        invite = 0
-        loc = 0
-        login = 0
-        event = 0
         if current_user.is_authenticated:
-            msg = Thread.get_unreaded(current_user).count()
-            invite = Invitation.get_by_state(InvitationState.WAITING).count()
-            loc = Location.get_since(
-                current_user.location_check_ts).count()
-            login = LoginLog.get_failed_since(
-                current_user.login_check_ts).count()
-            event = EventLog.get_since(current_user.event_check_ts).count()
-        return dict(msg_alerts=msg, invite_alerts=invite,
-                    location_alerts=loc, login_alerts=login,
-                    event_alerts=event)
+            return get_alerts(current_user)
+        return dict(msg_alerts=0, invite_alerts=0, location_alerts=0,
+                    login_alerts=0, event_alerts=0)
 
 
 def register_before_requests(app: Flask) -> None:
@@ -164,11 +175,12 @@ def register_before_requests(app: Flask) -> None:
     def update_last_seen() -> None:
         """Updates last seen field of currently logged in user
 
-        Keeps track of user actions on the page - stores last user access
+        Keeps track of user actions on the page - stores last user access,
+        the times are written to database at least every LAST_SEEN_INTERVAL.
         """
         if not is_public() and current_user.is_authenticated:
             current_user.update_last_seen()
-            db.session.commit()
+            last_seen_buffer.flush_if_due(app.config['LAST_SEEN_INTERVAL'])
 
     @app.before_request
     def set_locale() -> None:
@@ -180,14 +192,15 @@ def register_before_requests(app: Flask) -> None:
 def load_user(user_id: int):
     """Loads current user from database
 
-    Used by flask login manager to obtain current user information
+    Used by flask login manager to obtain current user information, banned
+    users are logged out.
 
     Args:
         user_id: ID of the user to fetch data for.
     Returns:
-        User object or None if not found
+        User object or None if not found or banned
     """
-    return User.get_by_id(user_id)
+    return User.get_logged_in(int(user_id))
 
 
 @login_manager.unauthorized_handler
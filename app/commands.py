@@ -7,12 +7,14 @@ import click
 from flask.cli import AppGroup
 
 from app.models.user import User, UserRole
+from app.models.upload import Upload, UploadState, process_upload
 from app.database import db
 from app.utils.utils import random_string
 
 
 user_cli = AppGroup('user', help="User management")
 translate_cli = AppGroup('translate', help="Translation utilities")
+upload_cli = AppGroup('upload', help="Uploaded files management")
 
 
 @user_cli.command('add-root')
@@ -66,6 +68,34 @@ def reset_root_pwd() -> None:
     print("Don't forget to change your password after first login")
 
 
+@upload_cli.command('process')
+@click.option('--all', 'process_all', is_flag=True,
+              help="Create missing thumbnails of all images too")
+def process_images(process_all: bool) -> None:
+    """Processes images which weren't processed in background.
+
+    E.g. the ones waiting for processing during restart. With --all, the
+    thumbnails of all the images are recreated (e.g. once the
+    THUMBNAIL_SIZES_PX are changed).
+    """
+    if process_all:
+        for upload in Upload.get_photos().filter(
+                Upload.state == UploadState.READY):
+            try:
+                process_upload(upload.path, reduce=False)
+            except Exception as exc:  # pylint: disable=broad-except
+                print(f"Failed to process {upload.path}: {exc}")
+
+    for upload in Upload.get_unprocessed():
+        try:
+            process_upload(upload.path)
+            upload.state = UploadState.READY
+        except Exception as exc:  # pylint: disable=broad-except
+            print(f"Failed to process {upload.path}: {exc}")
+            upload.state = UploadState.FAILED
+        db.session.commit()
+
+
 @translate_cli.command('init')
 @click.argument('language')
 def translate_init(language: str) -> None:
@@ -32,9 +32,31 @@ class Config:
     IMAGE_EXTENSIONS = ['jpg', 'jpeg', 'png', 'gif', 'bmp', 'tiff', 'svg',
                         'eps', 'webp', 'heif', 'heic']
     DISABLED_EXTENSIONS = ['exe', 'php', 'js', 'html']
+    # Size of the default thumbnail
     THUMBNAIL_SIZE_PX = 512
+    # Sizes of thumbnails generated for each image, the browsers choose the
+    # adequate one (srcset), run `flask upload process --all` once changed
+    THUMBNAIL_SIZES_PX = [256, THUMBNAIL_SIZE_PX, 1024]
+    # Formats of the thumbnail variants sent to browsers accepting them, in
+    # order of preference, the ones not supported by Pillow are skipped
+    THUMBNAIL_FORMATS = ['avif', 'webp']
+    # Size of the thumbnails shown in map popups
+    MAP_THUMBNAIL_SIZE_PX = 256
+    # Browser cache max age of the thumbnails in seconds
+    THUMBNAIL_MAX_AGE = 365 * 24 * 3600
+    # Internal location of the upload dir in nginx, uploaded files are sent
+    # by nginx (X-Accel-Redirect) if set
+    UPLOAD_ACCEL_REDIRECT = os.environ.get('UPLOAD_ACCEL_REDIRECT')
+    # Uploaded files are sent by the front proxy (X-Sendfile) if set
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE') == '1'
     # Max x or y resolution of the image (only uploads of image type affected)
     IMAGE_MAX_SIZE_PX = 2048
+    # Amount of processes resizing the uploaded images in background (the
+    # photos uploaded together are processed in parallel), 0 to process
+    # them in the request. Each web server worker runs its own pool, so
+    # half of the cores are used by default.
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS',
+                                       max(1, (os.cpu_count() or 2) // 2)))
 
     LOGGING_FORMAT = '%(asctime)s:%(levelname)s: %(message)s'
     LOGGING_LOCATION = 'app.log'
@@ -51,6 +73,22 @@ class Config:
     ITEMS_PER_PAGE = 20
     # amount of locations to show on single page
     LOCATIONS_PER_PAGE = 16
+    # show total amount of locations in listings (the counts are cached)
+    LOCATIONS_TOTAL = True
+    # Highest map zoom level for which the locations are clustered by server
+    MAP_CLUSTER_MAX_ZOOM = 8
+    # max amount of suggestions for the search box
+    AUTOCOMPLETE_LIMIT = 10
+    # max amount of changed locations returned by single sync request
+    CHANGES_PER_PAGE = 500
+    # max amount of seconds the last seen time of users may stay unsaved, 0
+    # to store it by every request
+    LAST_SEEN_INTERVAL = 60
+    # max amount of seconds the event log records may stay unsaved, None to
+    # store them in the transaction of the request
+    EVENT_LOG_INTERVAL = 5
+    # max amount of event log records inserted by single statement
+    EVENT_LOG_BATCH = 100
 
     # EMail configuration (gmail)
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'localhost')
@@ -1,13 +1,79 @@
 """Database utilities."""
 import uuid
-from typing import Optional
-from sqlalchemy import types, dialects
+from typing import Optional, Callable, FrozenSet, Iterable, List, Tuple
+from sqlalchemy import types, dialects, event, inspect
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql.util import find_tables
 
 from app.extensions import db
+from app.utils.cache import Cache
 from app.utils.geolocation import LatLon
 
 # pylint: disable=abstract-method
 
+# Max age of cached query counts in seconds, i.e. how long the changes made
+# by other processes (e.g. gunicorn workers) may go unnoticed
+COUNTS_CACHE_TTL = 300
+# Counts above this value are treated as approximate, they are not dropped
+# from cache when the tables change, only once they expire
+APPROXIMATE_COUNT_MIN = 1000
+
+_commit_hooks: List[Tuple[tuple, Callable]] = []
+# (sql, params): (count, approximate, tables)
+_counts_cache = Cache(ttl=COUNTS_CACHE_TTL, max_size=1024)
+
+
+def on_commit(*models):
+    """Registers function to be called once changes of models are commited.
+
+    The decorated function receives a list of added, modified and deleted
+    instances of given models. It's called after the transaction ends,
+    no database queries should be made from it.
+
+    Args:
+        models: Model classes to watch changes of
+    """
+    def decorator(function: Callable) -> Callable:
+        _commit_hooks.append((models, function))
+        return function
+    return decorator
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changes(session, flush_context) -> None:
+    """Stores objects changed by flush until the transaction ends."""
+    # pylint: disable=unused-argument
+    changes = session.info.setdefault('changes', set())
+    changes.update(session.new, session.dirty, session.deleted)
+
+
+@event.listens_for(Session, 'after_commit')
+def _run_commit_hooks(session) -> None:
+    """Passes commited objects to the registered hooks."""
+    run_commit_hooks(session.info.pop('changes', set()))
+
+
+def run_commit_hooks(items: Iterable['DBItem']) -> None:
+    """Passes commited objects to the registered hooks.
+
+    Called automatically for the session commits, the changes stored
+    without the session (e.g. bulk inserts) must be passed manually.
+
+    Args:
+        items: Added, modified and deleted instances
+    """
+    items = list(items)
+    for models, function in _commit_hooks:
+        instances = [item for item in items if isinstance(item, models)]
+        if instances:
+            function(instances)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session) -> None:
+    """Forgets objects changed in rolled back transaction."""
+    session.info.pop('changes', None)
+
 
 class DBItem(db.Model):
     """Parent class for all database items.
@@ -86,10 +152,12 @@ class _LatLonDb(types.TypeDecorator):
 
 class Latitude(_LatLonDb):
     """Custom database type for latitude data."""
+    cache_ok = True
 
 
 class Longitude(_LatLonDb):
     """Custom database type for longitude data."""
+    cache_ok = True
 
 
 class UUID(types.TypeDecorator):
@@ -162,6 +230,8 @@ class IntEnum(types.TypeDecorator):
         Returns:
             converted value
         """
+        if value is None:
+            return value
         return value.value
 
     def process_result_value(self, value, dialect):
@@ -173,4 +243,59 @@ class IntEnum(types.TypeDecorator):
         Returns:
             Converted Enum value
         """
+        if value is None:
+            return value
         return self._enum(value)
+
+
+def count(query: Query) -> Tuple[int, bool]:
+    """Counts results of the query, the counts are cached.
+
+    The counts are cached per SQL statement and its parameters (e.g. user
+    the results are filtered for). Small counts are dropped from cache once
+    any of the queried tables is changed by this process. Counts above
+    APPROXIMATE_COUNT_MIN are kept until expired, as the exact value of
+    e.g. growing logs is not important.
+
+    Each process keeps its own cache, the changes made by other processes
+    are noticed only once the counts expire (COUNTS_CACHE_TTL). So all the
+    counts are approximate, they are meant for pagination only, not for
+    decisions depending on the exact value.
+
+    Args:
+        query: SQL query to count results of
+    Returns:
+        Amount of results and True if the amount is above
+        APPROXIMATE_COUNT_MIN (shown as approximate)
+    """
+    query = query.order_by(None)
+    compiled = query.statement.compile()
+    key = (str(compiled), repr(sorted(compiled.params.items())))
+    cached = _counts_cache.get(key)
+    if cached is not None:
+        return cached[0], cached[1]
+
+    tables = frozenset(table.name for table in find_tables(
+        query.statement, check_columns=True, include_aliases=True))
+    result = query.count()
+    approximate = result > APPROXIMATE_COUNT_MIN
+    _counts_cache.set(key, (result, approximate, tables))
+    return result, approximate
+
+
+def _get_tables(item: DBItem) -> FrozenSet[str]:
+    """Gets names of the tables the item is stored in."""
+    mapper = inspect(type(item))
+    tables = {table.name for table in mapper.tables}
+    for relationship in mapper.relationships:
+        if relationship.secondary is not None:
+            tables.add(relationship.secondary.name)
+    return frozenset(tables)
+
+
+@on_commit(DBItem)
+def _clear_counts_cache(items: List[DBItem]) -> None:
+    """Drops exact cached counts of the changed tables."""
+    tables = frozenset().union(*[_get_tables(item) for item in items])
+    _counts_cache.delete_matching(
+        lambda key, value: not value[1] and not tables.isdisjoint(value[2]))
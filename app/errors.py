@@ -2,6 +2,7 @@
 from flask import render_template, request
 from flask import current_app as app
 from flask_login import current_user
+from werkzeug.exceptions import HTTPException
 
 from app.database import db
 from app.models.event import EventLog, UnauthorizedEvent
@@ -54,5 +55,7 @@ def unhandled_exception(error: Exception):
     Returns:
         A page content and error code.
     """
+    if isinstance(error, HTTPException):
+        return error
     app.logger.exception(f'Unhandled Exception: {request.path}: {str(error)}')
     return render_template('500.html'), 500
@@ -0,0 +1,55 @@
+"""Counters of alerts shown in the navigation bar."""
+from typing import Dict, List
+
+from app.database import DBItem, on_commit
+from app.utils.cache import Cache
+from app.models.event import EventLog
+from app.models.location import Location
+from app.models.message import Thread
+from app.models.user import User, Invitation, InvitationState, LoginLog
+
+# Max age of cached counters in seconds, changes made by other processes
+# (e.g. gunicorn workers) become visible once the counters expire
+ALERTS_CACHE_TTL = 60
+# Max amount of users to keep the counters for
+ALERTS_CACHE_SIZE = 1000
+
+_alerts_cache = Cache(ttl=ALERTS_CACHE_TTL, max_size=ALERTS_CACHE_SIZE)
+
+
+def _count_alerts(user: User) -> Dict[str, int]:
+    """Counts alerts of the user in database."""
+    return dict(
+        msg_alerts=Thread.get_unreaded(user).count(),
+        invite_alerts=Invitation.get_by_state(
+            InvitationState.WAITING).count(),
+        location_alerts=Location.get_since(user.location_check_ts).count(),
+        login_alerts=LoginLog.get_failed_since(user.login_check_ts).count(),
+        event_alerts=EventLog.get_since(user.event_check_ts).count())
+
+
+def get_alerts(user: User) -> Dict[str, int]:
+    """Gets counts of the alerts for the user.
+
+    The counters are cached per user, the check timestamps are part of
+    the key, so checking the alerts resets them immediately.
+
+    Args:
+        user: User to get the alerts for
+    Returns:
+        Counts of unread threads (msg_alerts), waiting invitations
+        (invite_alerts), new locations (location_alerts), failed logins
+        (login_alerts) and new events (event_alerts)
+    """
+    key = (user.id, user.location_check_ts, user.login_check_ts,
+           user.event_check_ts)
+    alerts: Dict[str, int] = _alerts_cache.get_or_set(
+        key, lambda: _count_alerts(user))
+    return alerts
+
+
+@on_commit(Thread, Invitation, Location, LoginLog, EventLog)
+def _clear_alerts_cache(items: List[DBItem]) -> None:
+    """Drops cached counters once the counted records change."""
+    # pylint: disable=unused-argument
+    _alerts_cache.clear()
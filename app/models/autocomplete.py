@@ -0,0 +1,178 @@
+"""Suggestions of location and category names for the search box."""
+import threading
+from time import monotonic
+from typing import Dict, Hashable, List, NamedTuple, Optional, Set, Tuple, \
+    cast
+from sqlalchemy import inspect
+
+from app.database import DBItem, on_commit
+from app.utils.prefix_index import PrefixIndex
+from app.models.location import Location, Category
+from app.models.user import User
+
+# Max age of the index in seconds, changes made by other processes (e.g.
+# gunicorn workers) become visible once the index is rebuilt
+INDEX_MAX_AGE = 300
+
+LOCATION = 'location'
+CATEGORY = 'category'
+
+
+class Suggestion(NamedTuple):
+    """Suggested record.
+
+    Attributes:
+        type: Type of the record (LOCATION or CATEGORY)
+        id: ID of the record
+        name: Name of the record
+    """
+    type: str
+    id: int
+    name: str
+
+
+class Autocomplete:
+    """In-memory index of location and category names.
+
+    The index is built on the first lookup, records changed by this process
+    are updated on the next lookup after the commit. The whole index is
+    rebuilt once it's older than max_age to get changes of other processes.
+    Lookups wait for the first build only, later builds and updates run in
+    a single thread while the others use the current index.
+
+    Attributes:
+        max_age: Amount of seconds after which the index is rebuilt
+    """
+
+    def __init__(self, max_age: float) -> None:
+        """Initializes the index.
+
+        Args:
+            max_age: Amount of seconds after which the index is rebuilt
+        """
+        self.max_age = max_age
+        self._index = PrefixIndex()
+        # (type, id): (name, published, owner_id)
+        self._records: Dict[Tuple[str, int],
+                            Tuple[str, bool, Optional[int]]] = {}
+        self._built: Optional[float] = None
+        self._pending: Set[Tuple[str, int]] = set()
+        self._lock = threading.Lock()
+        # held while the index is built or updated
+        self._build_lock = threading.Lock()
+
+    def _build(self) -> None:
+        """Builds the index from all locations and categories."""
+        records = self._load(Location.query, Category.query)
+        self._index = PrefixIndex(
+            (item, record[0]) for item, record in records.items())
+        self._records = records
+
+    def _update(self, items: Set[Tuple[str, int]]) -> None:
+        """Updates given records of the index."""
+        location_ids = [item[1] for item in items if item[0] == LOCATION]
+        category_ids = [item[1] for item in items if item[0] == CATEGORY]
+        loaded = self._load(
+            Location.query.filter(Location.id.in_(location_ids)),
+            Category.query.filter(Category.id.in_(category_ids)))
+
+        # lookups running in parallel keep using the previous records
+        records = dict(self._records)
+        for item in items:
+            if item in loaded:
+                records[item] = loaded[item]
+                self._index.add(item, loaded[item][0])
+            else:
+                self._index.remove(item)
+                records.pop(item, None)
+        self._records = records
+
+    @staticmethod
+    def _load(locations, categories) -> Dict[Tuple[str, int],
+                                             Tuple[str, bool, Optional[int]]]:
+        """Loads records indexed by (type, id) from the queries."""
+        records = {}
+        for location_id, name, published, owner_id in \
+                locations.with_entities(Location.id, Location.name,
+                                        Location.published, Location.owner_id):
+            records[(LOCATION, location_id)] = (name, published, owner_id)
+        for category_id, name in categories.with_entities(Category.id,
+                                                          Category.name):
+            records[(CATEGORY, category_id)] = (name, True, None)
+        return records
+
+    def _refresh(self) -> None:
+        """Builds or updates the index if needed."""
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        if not self._outdated() and not pending:
+            return
+
+        if not self._build_lock.acquire(blocking=self._built is None):
+            # updated by other thread, the changes are applied next time
+            with self._lock:
+                self._pending |= pending
+            return
+        try:
+            if self._outdated():
+                self._build()
+                self._built = monotonic()
+            elif pending:
+                self._update(pending)
+        finally:
+            self._build_lock.release()
+
+    def _outdated(self) -> bool:
+        """Checks if the index should be built again."""
+        return self._built is None or \
+            monotonic() - self._built > self.max_age
+
+    def invalidate(self, items: List[DBItem]) -> None:
+        """Marks records to be updated on the next lookup.
+
+        Args:
+            items: Changed locations and categories
+        """
+        with self._lock:
+            for item in items:
+                identity = inspect(item).identity
+                if identity is None:
+                    continue
+                kind = LOCATION if isinstance(item, Location) else CATEGORY
+                self._pending.add((kind, identity[0]))
+
+    def find(self, prefix: str, user: User,
+             limit: Optional[int] = None) -> List[Suggestion]:
+        """Finds records with a word in name starting with the prefix.
+
+        Private locations of other users are skipped, the same way as
+        by Location.filter_private.
+
+        Args:
+            prefix: Prefix to look for, diacritics and case are ignored
+            user: User viewing the data (his private locations are shown)
+            limit: Max amount of records to return, None for unlimited
+        Returns:
+            List of suggestions
+        """
+        self._refresh()
+        records = self._records
+
+        def visible(item: Hashable) -> bool:
+            record = records.get(cast(Tuple[str, int], item))
+            return record is not None and (record[1] or record[2] == user.id)
+
+        # the index stores the (type, id) keys of the records
+        found = cast(List[Tuple[str, int]],
+                     self._index.find(prefix, limit, visible))
+        return [Suggestion(item[0], item[1], records[item][0])
+                for item in found]
+
+
+autocomplete = Autocomplete(INDEX_MAX_AGE)
+
+
+@on_commit(Location, Category)
+def _invalidate_autocomplete(items: List[DBItem]) -> None:
+    """Marks changed locations and categories for reindexing."""
+    autocomplete.invalidate(items)
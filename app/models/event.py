@@ -1,10 +1,18 @@
 """Event models."""
+import os
+import queue
+import threading
 from abc import ABC
 from datetime import datetime
-from sqlalchemy.orm import Query
+from time import monotonic
+from typing import Any, Dict, List, Optional, cast
+from flask import Flask, current_app
+from sqlalchemy import event as sa_event, insert
+from sqlalchemy.orm import Query, Session
+from werkzeug.local import LocalProxy
 from flask_babel import lazy_gettext as _
 
-from app.database import DBItem, db, IntEnum
+from app.database import DBItem, db, IntEnum, run_commit_hooks
 from app.utils.enums import StringEnum
 from app.models.page import PageType
 from app.models.location import Location, Visit, Category
@@ -28,10 +36,16 @@ class EventSeverity(StringEnum):
 
 
 class Event(ABC):
-    """Abstract class for event description."""
+    """Abstract class for event description.
+
+    Attributes:
+        sync: Store the event in the current transaction instead of passing
+            it to the event_sink, used for the security critical events
+    """
     text: str = ''
     severity = EventSeverity.NORMAL
     type = EventType.OTHER
+    sync = False
 
 
 #
@@ -104,6 +118,8 @@ class PasswordChangeEvent(Event):
 
 
 class RoleChangeEvent(Event):
+    sync = True
+
     def __init__(self, user: User, new: UserRole):
         self.severity = EventSeverity.CRITICAL
         self.type = EventType.MODIFY
@@ -111,6 +127,8 @@ class RoleChangeEvent(Event):
 
 
 class BanEvent(Event):
+    sync = True
+
     def __init__(self, ban: Ban):
         self.severity = EventSeverity.HIGH
         self.type = EventType.CREATE
@@ -237,12 +255,141 @@ class EventLog(DBItem):
     def log(cls, user: User, event: Event) -> None:
         """Creates a log record
 
+        The record is passed to the event_sink to be stored later unless
+        the event is synchronous or the sink is disabled by configuration.
+        Either way, the record is stored only if the current transaction
+        is committed.
+
         Args:
             user: User that caused the event
             event: Event info
         """
-        cls.create(
-            user=user,
+        if event.sync or current_app.config['EVENT_LOG_INTERVAL'] is None:
+            cls.create(
+                user=user,
+                type=event.type,
+                severity=event.severity,
+                text=event.text)
+            return
+
+        db.session.info.setdefault('events', []).append(dict(
+            timestamp=datetime.utcnow(),
+            user_id=user.id,
             type=event.type,
             severity=event.severity,
-            text=event.text)
+            text=event.text))
+
+
+class EventSink:
+    """Buffers event log records to be inserted in batches.
+
+    Each process (e.g. gunicorn worker) runs its own background thread,
+    the records are inserted by a single statement once the oldest one
+    waits for EVENT_LOG_INTERVAL seconds or EVENT_LOG_BATCH records are
+    collected. The records of the committed transaction are added to the
+    sink, they are then stored independently of the request.
+    """
+
+    def __init__(self) -> None:
+        """Initializes an empty sink, the thread is started on demand."""
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Gets amount of records waiting to be stored."""
+        return self._queue.qsize()
+
+    def add(self, app: Flask, record: Dict[str, Any]) -> None:
+        """Adds event log record to be stored.
+
+        Args:
+            app: Flask application to store the record for
+            record: Column values of the EventLog record
+        """
+        self._start(app)
+        self._queue.put(record)
+
+    def flush(self) -> None:
+        """Stores all buffered records, requires the app context."""
+        while True:
+            records = self._get_batch(current_app.config['EVENT_LOG_BATCH'])
+            if not records:
+                return
+            self._store(records)
+
+    def _start(self, app: Flask) -> None:
+        """Starts the thread unless running already in this process."""
+        with self._lock:
+            # threads don't survive fork of the worker processes
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, args=(app,), name='event-sink',
+                daemon=True)
+            self._thread.start()
+
+    def _get_batch(self, size: int,
+                   timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Gets up to size records from the queue.
+
+        Args:
+            size: Max amount of records to get
+            timeout: Max amount of seconds to wait for the records, None to
+                get only the records already waiting
+        """
+        records: List[Dict[str, Any]] = []
+        deadline = monotonic() + (timeout or 0)
+        while len(records) < size:
+            try:
+                if timeout is None:
+                    records.append(self._queue.get_nowait())
+                else:
+                    records.append(self._queue.get(
+                        timeout=max(deadline - monotonic(), 0)))
+            except queue.Empty:
+                break
+        return records
+
+    @staticmethod
+    def _store(records: List[Dict[str, Any]]) -> None:
+        """Inserts the records and commits the current session."""
+        db.session.execute(insert(EventLog.__table__), records)
+        db.session.commit()
+        run_commit_hooks(EventLog(**record) for record in records)
+
+    def _run(self, app: Flask) -> None:
+        """Stores the records in batches until the process exits."""
+        while True:
+            records = [self._queue.get()]
+            records += self._get_batch(app.config['EVENT_LOG_BATCH'] - 1,
+                                       app.config['EVENT_LOG_INTERVAL'])
+            with app.app_context():
+                try:
+                    self._store(records)
+                except Exception:  # pylint: disable=broad-except
+                    db.session.rollback()
+                    app.logger.exception(
+                        f'Failed to store {len(records)} event log records')
+
+
+event_sink = EventSink()
+
+
+@sa_event.listens_for(Session, 'after_commit')
+def _add_events(session) -> None:
+    """Passes events logged by the commited transaction to the sink."""
+    records = session.info.pop('events', [])
+    if records:
+        # current_app is typed as Flask, it's a proxy to the app in fact
+        app = cast(LocalProxy, current_app)._get_current_object()
+        for record in records:
+            event_sink.add(app, record)
+
+
+@sa_event.listens_for(Session, 'after_rollback')
+def _discard_events(session) -> None:
+    """Forgets events logged by the rolled back transaction."""
+    session.info.pop('events', None)
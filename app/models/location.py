@@ -1,15 +1,28 @@
 """Models for locations module."""
 import uuid
 from enum import Enum, auto
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, \
+    Tuple, cast
 from datetime import datetime
 from flask_babel import lazy_gettext as _
-from sqlalchemy import CheckConstraint, or_
-from sqlalchemy.orm import Query
+from sqlalchemy import CheckConstraint, Float, Integer, or_, and_, func, \
+    type_coerce, event, select, literal
+from sqlalchemy.orm import Query, Session
 
-from app.database import DBItem, db, Latitude, Longitude, UUID, IntEnum
+from app.database import DBItem, db, Latitude, Longitude, UUID, IntEnum, \
+    on_commit
+from app.utils.cache import Cache
 from app.utils.enums import StringEnum
-from app.models.upload import UploadType
+from app.utils.geolocation import BoundingBox, Cluster, ClusterGrid
+from app.models import search as search_index
+from app.models.version import VersionedCache
+from app.models.upload import Upload, UploadType, get_thumbnail_path
 from app.models.user import User
+from app.models.locations.underground import Underground, \
+    UndergroundState, UndergroundAccessibility
+from app.models.locations.urbex import Urbex, UrbexState, \
+    UrbexAccessibility
+from app.models.locations.hiking import Hiking
 
 
 # DB strings lengths
@@ -19,6 +32,18 @@ MAX_SHORT_DESC_LEN = 256
 MAX_URL_LEN = 256
 MAX_COMMENT_LEN = 2048
 
+# Max age of cached map clusters in seconds
+CLUSTERS_CACHE_TTL = 300
+# Max age of cached facet counts in seconds
+FACETS_CACHE_TTL = 300
+# Max amount of cached facet counts (combinations of filters and users)
+FACETS_CACHE_SIZE = 1000
+# Max amount of users to keep the bookmarks lists for
+BOOKMARKS_CACHE_SIZE = 1000
+
+_clusters_cache = Cache(ttl=CLUSTERS_CACHE_TTL)
+_facets_cache = Cache(ttl=FACETS_CACHE_TTL, max_size=FACETS_CACHE_SIZE)
+
 
 bookmark_association = db.Table(
     'bookmark_association',
@@ -30,7 +55,10 @@ bookmark_association = db.Table(
 category_association = db.Table(
     'category_association',
     db.Column('category_id', db.ForeignKey('category.id')),
-    db.Column('location_id', db.ForeignKey('location.id'))
+    db.Column('location_id', db.ForeignKey('location.id')),
+    db.Index('ix_category_association_category_id_location_id',
+             'category_id', 'location_id'),
+    db.Index('ix_category_association_location_id', 'location_id'),
 )
 
 
@@ -42,6 +70,15 @@ class LocationType(Enum):
     ALL = auto()
 
 
+# Location types having state and accessibility attributes mapped to
+# (details model, state enum, accessibility enum)
+LOCATION_DETAILS = {
+    LocationType.UNDERGROUND: (Underground, UndergroundState,
+                               UndergroundAccessibility),
+    LocationType.URBEX: (Urbex, UrbexState, UrbexAccessibility),
+}
+
+
 class Country(StringEnum):
     """Countries list."""
     OTHER = _("Other")
@@ -52,6 +89,108 @@ class Country(StringEnum):
     AUSTRIA = _("Austria")
 
 
+class ListItem(NamedTuple):
+    """Cached record of categories and bookmarks lists.
+
+    Attributes:
+        id: ID of the record
+        name: Name of the record
+    """
+    id: int
+    name: str
+
+
+class LocationFilter(NamedTuple):
+    """Filter of the locations listings, None stands for any value.
+
+    Attributes:
+        country: Country the locations are in
+        category: ID of the category the locations are assigned to
+        state: State of the locations (UndergroundState or UrbexState)
+        accessibility: Accessibility of the locations (UndergroundAccessibility
+            or UrbexAccessibility)
+        area: Area the locations lie in
+    """
+    country: Optional[Country] = None
+    category: Optional[int] = None
+    state: Optional[StringEnum] = None
+    accessibility: Optional[StringEnum] = None
+    area: Optional[BoundingBox] = None
+
+    def has_attributes(self) -> bool:
+        """Checks if any filter other than the area is set."""
+        return self._replace(area=None) != LocationFilter()
+
+
+class LocationSummary:
+    """Lightweight read-only record of a location for listings and map.
+
+    Attributes:
+        id: ID of the location
+        name: Name of the location
+        description: Short description of the location
+        latitude: Latitude in decimal degrees
+        longitude: Longitude in decimal degrees
+        published: True if the location is published
+        created: Creation date
+        modified: Last modification date
+        owner_id: ID of the location owner
+        owner_name: Full name of the location owner
+        type: Type specific to location kind (e.g. UndergroundType)
+        state: Location state, None if not defined for location kind
+        accessibility: Location accessibility, None if not defined
+        photo_path: Relative path to title image, None if not set
+        thumbnail: Relative path to title image thumbnail, None if not set
+    """
+    __slots__ = ('id', 'name', 'description', 'latitude', 'longitude',
+                 'published', 'created', 'modified', 'owner_id',
+                 'owner_name', 'type', 'state', 'accessibility', 'photo_path',
+                 'thumbnail')
+
+    def __init__(self, row) -> None:
+        """Initializes the record from a row of Location.summarize query.
+
+        Args:
+            row: Query result row
+        """
+        self.id = row.id
+        self.name = row.name
+        self.description = row.description
+        self.latitude = row.latitude
+        self.longitude = row.longitude
+        self.published = row.published
+        self.created = row.created
+        self.modified = row.modified
+        self.owner_id = row.owner_id
+        self.owner_name = f'{row.owner_first_name} {row.owner_last_name}'
+        self.photo_path = row.photo_path
+        self.thumbnail = None
+        if row.photo_path:
+            self.thumbnail = get_thumbnail_path(row.photo_path)
+
+        self.state = None
+        self.accessibility = None
+        if row.underground_type is not None:
+            self.type = row.underground_type
+            self.state = row.underground_state
+            self.accessibility = row.underground_accessibility
+        elif row.urbex_type is not None:
+            self.type = row.urbex_type
+            self.state = row.urbex_state
+            self.accessibility = row.urbex_accessibility
+        else:
+            self.type = row.hiking_type
+
+    @classmethod
+    def from_rows(cls, rows: Iterable) -> List['LocationSummary']:
+        """Creates records from rows of Location.summarize query.
+
+        Args:
+            rows: Query result rows
+        """
+        return [cls(row) for row in rows]
+
+
 class Location(DBItem):
     """Location description."""
     __table_args__ = (
@@ -59,6 +198,12 @@ class Location(DBItem):
             'NOT(urbex_id IS NOT NULL ' +
             'AND underground_id IS NOT NULL ' +
             'AND hiking_id is not NULL)'),
+        db.Index('ix_location_latitude_longitude', 'latitude', 'longitude'),
+        db.Index('ix_location_modified_id', 'modified', 'id'),
+        db.Index('ix_location_type_published_modified', 'type', 'published',
+                 'modified'),
+        db.Index('ix_location_owner_id_modified', 'owner_id', 'modified'),
+        db.Index('ix_location_country_type', 'country', 'type'),
     )
 
     uuid = db.Column(UUID(), default=uuid.uuid4, unique=True)
@@ -74,10 +219,12 @@ class Location(DBItem):
     longitude = db.Column(Longitude(), nullable=False)
     published = db.Column(db.Boolean(), nullable=False)
     country = db.Column(IntEnum(Country), nullable=False)
+    # must match the type specific record set below
+    type = db.Column(IntEnum(LocationType), nullable=False)
 
     parent_id = db.Column(db.Integer(), db.ForeignKey('location.id'))
     owner_id = db.Column(db.Integer(), db.ForeignKey('user.id'),
-                         nullable=False, index=True)
+                         nullable=False)
     photo_id = db.Column(db.Integer(), db.ForeignKey('upload.id'))
 
     # only one should be non-null
@@ -116,15 +263,21 @@ class Location(DBItem):
         """
         if loc_type == LocationType.ALL:
             return query
-        elif loc_type == LocationType.UNDERGROUND:
-            return query.filter(cls.underground_id.isnot(None))
-        elif loc_type == LocationType.URBEX:
-            return query.filter(cls.urbex_id.isnot(None))
-        elif loc_type == LocationType.HIKING:
-            return query.filter(cls.hiking_id.isnot(None))
+        if loc_type in (LocationType.UNDERGROUND, LocationType.URBEX,
+                        LocationType.HIKING):
+            return query.filter(cls.type == loc_type)
 
         raise ValueError(f'Invalid location type: {loc_type}')
 
+    @classmethod
+    def _get_details_id(cls, loc_type: LocationType):
+        """Gets column referencing the type specific record of location."""
+        return {
+            LocationType.UNDERGROUND: cls.underground_id,
+            LocationType.URBEX: cls.urbex_id,
+            LocationType.HIKING: cls.hiking_id,
+        }[loc_type]
+
     @classmethod
     def filter_private(cls, query: Query, user: User) -> Query:
         """Filters out the private locations from query
@@ -137,6 +290,279 @@ class Location(DBItem):
         """
         return query.filter(or_(cls.published, cls.owner == user))
 
+    @classmethod
+    def summarize(cls, query: Query) -> Query:
+        """Selects only the columns shown in locations listings and map.
+
+        The rows are meant to be wrapped in LocationSummary, all of the
+        data is loaded by a single query without building Location objects.
+
+        Args:
+            query: SQL query for locations
+        Returns:
+            Query for rows of location summary columns
+        """
+        return query.outerjoin(
+            Upload, cls.photo_id == Upload.id
+        ).outerjoin(
+            Underground, cls.underground_id == Underground.id
+        ).outerjoin(
+            Urbex, cls.urbex_id == Urbex.id
+        ).outerjoin(
+            Hiking, cls.hiking_id == Hiking.id
+        ).join(
+            User, cls.owner_id == User.id
+        ).with_entities(
+            cls.id, cls.name, cls.description,
+            type_coerce(cls.latitude, Float).label('latitude'),
+            type_coerce(cls.longitude, Float).label('longitude'),
+            cls.published, cls.created, cls.modified, cls.owner_id,
+            User.first_name.label('owner_first_name'),
+            User.last_name.label('owner_last_name'),
+            Upload.path.label('photo_path'),
+            Underground.type.label('underground_type'),
+            Underground.state.label('underground_state'),
+            Underground.accessibility.label('underground_accessibility'),
+            Urbex.type.label('urbex_type'),
+            Urbex.state.label('urbex_state'),
+            Urbex.accessibility.label('urbex_accessibility'),
+            Hiking.type.label('hiking_type'))
+
+    @classmethod
+    def filter_area(cls, query: Query, area: BoundingBox) -> Query:
+        """Filters out the locations outside of given area
+
+        Args:
+            query: SQL query to be filtered
+            area: Area the locations must lie in
+        Returns:
+            Filtered query
+        """
+        query = query.filter(cls.latitude.between(area.south, area.north))
+        if area.crosses_antimeridian:
+            return query.filter(or_(cls.longitude >= area.west,
+                                    cls.longitude <= area.east))
+        return query.filter(and_(cls.longitude >= area.west,
+                                 cls.longitude <= area.east))
+
+    @classmethod
+    def filter_by(cls, query: Query, loc_type: LocationType,
+                  filters: LocationFilter, skip: Optional[str] = None
+                  ) -> Query:
+        """Filters the query by location attributes.
+
+        Args:
+            query: SQL query to be filtered
+            loc_type: Type of the locations, state and accessibility
+                filters are applied only to types having these attributes
+            filters: Attributes to filter by
+            skip: Name of the filter to be ignored (e.g. for facet counts)
+        Returns:
+            Filtered query
+        """
+        if filters.country is not None and skip != 'country':
+            query = query.filter(cls.country == filters.country)
+        if filters.category is not None and skip != 'category':
+            query = query.filter(cls.id.in_(
+                select(category_association.c.location_id).where(
+                    category_association.c.category_id == filters.category)))
+        if filters.area is not None and skip != 'area':
+            query = cls.filter_area(query, filters.area)
+
+        details = LOCATION_DETAILS.get(loc_type)
+        if details is None:
+            return query
+        model, details_id = details[0], cls._get_details_id(loc_type)
+        if filters.state is not None and skip != 'state':
+            query = query.filter(details_id.in_(
+                select(model.id).where(model.state == filters.state)))
+        if filters.accessibility is not None and skip != 'accessibility':
+            query = query.filter(details_id.in_(
+                select(model.id).where(
+                    model.accessibility == filters.accessibility)))
+        return query
+
+    @classmethod
+    def _count_facets(cls, loc_type: LocationType, filters: LocationFilter,
+                      user: User) -> Dict[str, Dict[Any, int]]:
+        """Counts locations per facet values by a single aggregate query."""
+        base = cls.filter_private(cls._filter(cls.query, loc_type), user)
+
+        def facet(name: str, query: Query, column) -> Query:
+            value = type_coerce(column, Integer)
+            return cls.filter_by(query, loc_type, filters, skip=name) \
+                .with_entities(literal(name).label('facet'),
+                               value.label('value'),
+                               func.count(cls.id).label('count')) \
+                .group_by(value)
+
+        enums: Dict[str, Any] = {'country': Country, 'category': int}
+        queries = [
+            facet('country', base, cls.country),
+            facet('category', base.join(
+                category_association,
+                category_association.c.location_id == cls.id),
+                  category_association.c.category_id),
+        ]
+        if loc_type == LocationType.ALL:
+            enums['type'] = LocationType
+            queries.append(facet('type', base, cls.type))
+
+        details = LOCATION_DETAILS.get(loc_type)
+        if details is not None:
+            model, enums['state'], enums['accessibility'] = details
+            joined = base.join(model,
+                               cls._get_details_id(loc_type) == model.id)
+            queries.append(facet('state', joined, model.state))
+            queries.append(facet('accessibility', joined,
+                                 model.accessibility))
+
+        facets: Dict[str, Dict[Any, int]] = {name: {} for name in enums}
+        for name, value, count in queries[0].union_all(*queries[1:]):
+            if value is not None:
+                facets[name][enums[name](value)] = count
+        return facets
+
+    @classmethod
+    def get_facets(cls, loc_type: LocationType, filters: LocationFilter,
+                   user: User) -> Dict[str, Dict[Any, int]]:
+        """Counts locations visible to the user per values of attributes.
+
+        Counts of each facet are filtered by all the filters but its own,
+        i.e. the count is the amount of locations found once the value is
+        selected. Counts without an area filter are cached until the
+        locations change.
+
+        Args:
+            loc_type: Type of the locations
+            filters: Filters applied to the locations
+            user: User viewing the data (his private locations are included)
+        Returns:
+            Facet name (country, category, type, state, accessibility) to
+            {value: count} mapping, category values are category IDs. The
+            type facet is present only for all locations, state and
+            accessibility only for types having these attributes.
+        """
+        if filters.area is not None:
+            return cls._count_facets(loc_type, filters, user)
+        facets: Dict[str, Dict[Any, int]] = _facets_cache.get_or_set(
+            (loc_type, filters, user.id),
+            lambda: cls._count_facets(loc_type, filters, user))
+        return facets
+
+    @classmethod
+    def _get_coordinates(cls, query: Query) -> Query:
+        """Selects only plain coordinates of the locations.
+
+        Args:
+            query: SQL Query to select coordinates from
+        Returns:
+            Query for (latitude, longitude) tuples in decimal degrees
+        """
+        return query.with_entities(type_coerce(cls.latitude, Float),
+                                   type_coerce(cls.longitude, Float))
+
+    @classmethod
+    def _get_published_clusters(cls, loc_type: LocationType,
+                                zoom: int) -> ClusterGrid:
+        """Clusters all published locations of given type.
+
+        Args:
+            loc_type: Type of the location to cluster
+            zoom: Map zoom level to cluster locations for
+        """
+        grid = ClusterGrid(zoom)
+        query = cls._filter(cls.query, loc_type).filter_by(published=True)
+        for latitude, longitude in cls._get_coordinates(query):
+            grid.add(latitude, longitude)
+        return grid
+
+    @classmethod
+    def get_clusters(cls, loc_type: LocationType, zoom: int, user: User,
+                     area: Optional[BoundingBox] = None,
+                     filters: Optional[LocationFilter] = None
+                     ) -> List[Cluster]:
+        """Gets locations grouped to clusters for the map overview
+
+        Clusters of published locations are cached per zoom level, private
+        locations of the user are added on top of them. Locations filtered
+        by attributes are clustered without caching.
+
+        Args:
+            loc_type: Type of the location to cluster
+            zoom: Map zoom level to cluster locations for
+            user: User viewing the data (his private locations will be shown)
+            area: Area to get the clusters for, all clusters if None
+            filters: Attributes of the locations to cluster, all if None
+        Returns:
+            List of clusters
+        """
+        if filters is not None and filters.has_attributes():
+            grid = ClusterGrid(zoom)
+            query = cls.filter_by(cls.filter_private(
+                cls._filter(cls.query, loc_type), user), loc_type, filters)
+            for latitude, longitude in cls._get_coordinates(query):
+                grid.add(latitude, longitude)
+            return grid.get_clusters(area)
+
+        grid = cast(ClusterGrid, _clusters_cache.get_or_set(
+            (loc_type, zoom),
+            lambda: cls._get_published_clusters(loc_type, zoom)))
+
+        query = cls._filter(cls.query, loc_type).filter_by(
+            published=False, owner=user)
+        private = cls._get_coordinates(query).all()
+        if private:
+            grid = grid.copy()
+            for latitude, longitude in private:
+                grid.add(latitude, longitude)
+        return grid.get_clusters(area)
+
+    @classmethod
+    def get_version(cls, loc_type: LocationType,
+                    user: User) -> Tuple[int, Optional[datetime]]:
+        """Gets version of the locations visible to the user.
+
+        The version changes when a location is added, modified or removed.
+
+        Args:
+            loc_type: Type of the locations
+            user: User viewing the data (his private locations are included)
+        Returns:
+            Amount of locations and the last modification date (None if
+            there are no locations)
+        """
+        query = cls.filter_private(cls._filter(cls.query, loc_type), user)
+        count, modified = query.with_entities(func.count(cls.id),
+                                              func.max(cls.modified)).one()
+        return count, modified
+
+    @classmethod
+    def get_modified_since(cls, loc_type: LocationType,
+                           modified: Optional[datetime] = None,
+                           location_id: int = 0) -> Query:
+        """Query for locations modified since given position, oldest first
+
+        Locations are ordered by modification date and ID, the position
+        is the modification date and ID of the last location already seen.
+
+        Args:
+            loc_type: Type of the location to query for
+            modified: Modification date of the last seen location, None for
+                all locations
+            location_id: ID of the last seen location
+
+        Returns:
+            Location query
+        """
+        query = cls._filter(cls.query, loc_type).order_by(
+            cls.modified.asc(), cls.id.asc())
+        if modified is None:
+            return query
+        return query.filter(or_(
+            cls.modified > modified,
+            and_(cls.modified == modified, cls.id > location_id)))
+
     @classmethod
     def get(cls, loc_type: LocationType) -> Query:
         """Query for locations
@@ -211,7 +637,10 @@ class Location(DBItem):
 
     @classmethod
     def search(cls, string) -> Query:
-        """Search for string in location names
+        """Search for string in location names, descriptions and categories
+
+        Full-text index is used if supported by the database, the best
+        matches are returned first. Only names are searched otherwise.
 
         Args:
             string: String to search for
@@ -219,7 +648,14 @@ class Location(DBItem):
         Returns:
             Locations query corresponding to search string
         """
-        return cls.query.filter(cls.name.like(f'%{string}%'))
+        if not search_index.is_supported():
+            return cls.query.filter(cls.name.like(f'%{string}%'))
+        return search_index.search(cls.query, cls.id, string or '')
+
+    def delete(self) -> None:
+        """Deletes the location and records the deletion."""
+        DeletedLocation.create(location_id=self.id, uuid=self.uuid)
+        super().delete()
 
     def has_documents(self) -> bool:
         """Checks if the location has any documents to show."""
@@ -235,6 +671,31 @@ class Location(DBItem):
         return len(list(images)) != 0
 
 
+class DeletedLocation(DBItem):
+    """Records of deleted locations, used for synchronization of clients."""
+    location_id = db.Column(db.Integer(), nullable=False)
+    uuid = db.Column(UUID(), nullable=False)
+    deleted = db.Column(db.DateTime(), default=datetime.utcnow,
+                        nullable=False)
+
+    @classmethod
+    def get_since(cls, deleted_id: int) -> Query:
+        """Query for deletions recorded after given record, oldest first
+
+        Args:
+            deleted_id: ID of the last seen deletion record
+
+        Returns:
+            Deleted locations query
+        """
+        return cls.query.filter(cls.id > deleted_id).order_by(cls.id.asc())
+
+    @classmethod
+    def get_last_id(cls) -> int:
+        """Gets ID of the last deletion record, 0 if there are none."""
+        return db.session.query(func.max(cls.id)).scalar() or 0
+
+
 class Category(DBItem):
     """Location categories table."""
     name = db.Column(db.String(MAX_NAME_LEN), nullable=False)
@@ -267,11 +728,19 @@ class Category(DBItem):
         """
         return cls.query.order_by(cls.name.asc())
 
+    @classmethod
+    def get_list(cls) -> List[ListItem]:
+        """Gets cached list of all categories ordered by name."""
+        items: List[ListItem] = _categories_cache.get_or_set(None, lambda: [
+            ListItem(*row) for row in cls.get().with_entities(cls.id,
+                                                              cls.name)])
+        return items
+
     @classmethod
     def choices(cls):
         """Get list of choices for wtforms (id, name)."""
         choices = [('', _('Categories'))]
-        return choices + [(c.id, c.name) for c in cls.get().all()]
+        return choices + [(c.id, c.name) for c in cls.get_list()]
 
     @classmethod
     def coerce(cls, item):
@@ -370,6 +839,32 @@ class Bookmarks(DBItem):
         """
         return cls.query.filter_by(user=user)
 
+    @classmethod
+    def get_list(cls, user: User) -> List[ListItem]:
+        """Gets cached list of the user's bookmarks.
+
+        Args:
+            user: User to get bookmarks for
+        """
+        items: List[ListItem] = _bookmarks_cache.get_or_set(user.id, lambda: [
+            ListItem(*row) for row in cls.get_by_user(user).with_entities(
+                cls.id, cls.name)])
+        return items
+
+    @classmethod
+    def get_ids_with(cls, user: User, location: Location) -> Set[int]:
+        """Gets IDs of the user's bookmarks containing the location.
+
+        Args:
+            user: User to get bookmarks for
+            location: Location to look for
+        """
+        query = cls.get_by_user(user).join(
+            bookmark_association,
+            bookmark_association.c.bookmark_id == cls.id
+        ).filter(bookmark_association.c.location_id == location.id)
+        return {row[0] for row in query.with_entities(cls.id)}
+
     @classmethod
     def get_by_name(cls, user: User, name: str):
         """Gets bookmark list by it's name.
@@ -391,3 +886,63 @@ class Bookmarks(DBItem):
         if cls.query.filter_by(user=user, name=name).count() != 0:
             return True
         return False
+
+
+_categories_cache = VersionedCache('categories', Category)
+_bookmarks_cache = VersionedCache('bookmarks', Bookmarks,
+                                  max_size=BOOKMARKS_CACHE_SIZE)
+
+
+@on_commit(Location)
+def _clear_clusters_cache(locations: List[Location]) -> None:
+    """Drops cached map clusters once locations are changed."""
+    # pylint: disable=unused-argument
+    _clusters_cache.clear()
+
+
+@on_commit(Location, Category, Underground, Urbex)
+def _clear_facets_cache(items: List[DBItem]) -> None:
+    """Drops cached facet counts once locations or their details change."""
+    # pylint: disable=unused-argument
+    _facets_cache.clear()
+
+
+def _get_category_locations(session: Session,
+                            categories: Iterable[Category]) -> Set[int]:
+    """Gets IDs of locations assigned to the categories."""
+    ids = [category.id for category in categories if category.id]
+    if not ids:
+        return set()
+    query = select(category_association.c.location_id).where(
+        category_association.c.category_id.in_(ids))
+    return set(session.connection().execute(query).scalars())
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_search_changes(session, flush_context, instances) -> None:
+    """Stores locations of modified categories before the flush."""
+    # pylint: disable=unused-argument
+    categories = [item for item in session.dirty | session.deleted
+                  if isinstance(item, Category)]
+    if categories:
+        with session.no_autoflush:
+            ids = _get_category_locations(session, categories)
+        session.info.setdefault('search_locations', set()).update(ids)
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_search_index(session, flush_context) -> None:
+    """Updates search index of locations modified by the flush."""
+    # pylint: disable=unused-argument
+    ids = session.info.pop('search_locations', set())
+    changed = session.new | session.dirty
+    ids.update(item.id for item in changed if isinstance(item, Location))
+    ids.update(_get_category_locations(session, [
+        item for item in changed if isinstance(item, Category)]))
+    removed = {item.id for item in session.deleted
+               if isinstance(item, Location)}
+
+    if removed:
+        search_index.remove(session.connection(), removed)
+    if ids - removed:
+        search_index.update(session.connection(), ids - removed)
@@ -77,8 +77,8 @@ class MaterialType(StringEnum):
 class Underground(DBItem):
     """Table of underground location metadata."""
     type = db.Column(IntEnum(UndergroundType), nullable=False)
-    state = db.Column(IntEnum(UndergroundState), nullable=False)
-    accessibility = db.Column(IntEnum(UndergroundAccessibility))
+    state = db.Column(IntEnum(UndergroundState), nullable=False, index=True)
+    accessibility = db.Column(IntEnum(UndergroundAccessibility), index=True)
     tools = db.Column(db.String(MAX_TOOLS_LEN))
 
     length = db.Column(db.Integer())
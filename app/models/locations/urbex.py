@@ -43,6 +43,6 @@ class UrbexAccessibility(StringEnum):
 class Urbex(DBItem):
     """Table of underground location metadata."""
     type = db.Column(IntEnum(UrbexType), nullable=False)
-    state = db.Column(IntEnum(UrbexState), nullable=False)
-    accessibility = db.Column(IntEnum(UrbexAccessibility))
+    state = db.Column(IntEnum(UrbexState), nullable=False, index=True)
+    accessibility = db.Column(IntEnum(UrbexAccessibility), index=True)
     abandoned_year = db.Column(db.Integer())
@@ -0,0 +1,156 @@
+"""Full-text search index of locations.
+
+The index is stored in the location_search table, FTS5 virtual table is
+used on SQLite and a table with FULLTEXT index on MySQL. Other databases
+are not supported, the search falls back to simple LIKE there.
+"""
+import re
+from typing import Iterable, List
+from sqlalchemy import DDL, Column, event, false, text, bindparam
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Query
+from sqlalchemy.sql import table, column
+
+from app.database import db
+
+SUPPORTED_DIALECTS = ('sqlite', 'mysql')
+# Relative weights of name, description, about and categories columns
+SQLITE_WEIGHTS = (10.0, 2.0, 1.0, 5.0)
+
+_sqlite_table = table('location_search', column('rowid'))
+_mysql_table = table('location_search', column('location_id'),
+                     column('name'), column('description'), column('about'),
+                     column('categories'))
+
+_CREATE_SQLITE = """
+CREATE VIRTUAL TABLE location_search USING fts5(
+    name, description, about, categories,
+    tokenize='unicode61 remove_diacritics 2'
+)"""
+
+_CREATE_MYSQL = """
+CREATE TABLE location_search (
+    location_id INTEGER NOT NULL PRIMARY KEY,
+    name VARCHAR(32) NOT NULL,
+    description VARCHAR(2048) NOT NULL,
+    about TEXT NOT NULL,
+    categories TEXT NOT NULL,
+    FULLTEXT INDEX ix_location_search (name, description, about, categories)
+) ENGINE=InnoDB"""
+
+_DELETE_SQLITE = "DELETE FROM location_search WHERE rowid IN :ids"
+
+_DELETE_MYSQL = "DELETE FROM location_search WHERE location_id IN :ids"
+
+_INSERT_SQLITE = """
+INSERT INTO location_search(rowid, name, description, about, categories)
+SELECT location.id, location.name, coalesce(location.description, ''),
+    coalesce(location.about, ''), coalesce((
+        SELECT group_concat(category.name, ' ') FROM category
+        JOIN category_association
+            ON category.id = category_association.category_id
+        WHERE category_association.location_id = location.id), '')
+FROM location WHERE location.id IN :ids"""
+
+_INSERT_MYSQL = """
+INSERT INTO location_search(location_id, name, description, about, categories)
+SELECT location.id, location.name, coalesce(location.description, ''),
+    coalesce(location.about, ''), coalesce((
+        SELECT group_concat(category.name SEPARATOR ' ') FROM category
+        JOIN category_association
+            ON category.id = category_association.category_id
+        WHERE category_association.location_id = location.id), '')
+FROM location WHERE location.id IN :ids"""
+
+event.listen(db.metadata, 'after_create',
+             DDL(_CREATE_SQLITE).execute_if(dialect='sqlite'))
+event.listen(db.metadata, 'after_create',
+             DDL(_CREATE_MYSQL).execute_if(dialect='mysql'))
+event.listen(db.metadata, 'before_drop',
+             DDL('DROP TABLE IF EXISTS location_search').execute_if(
+                 callable_=lambda ddl, target, bind, **kw:
+                 bind.dialect.name in SUPPORTED_DIALECTS))
+
+
+def is_supported() -> bool:
+    """Checks if the full-text search is supported by current database."""
+    return db.engine.dialect.name in SUPPORTED_DIALECTS
+
+
+def get_terms(string: str) -> List[str]:
+    """Splits search string to words to look for.
+
+    Args:
+        string: Search string as entered by user
+    Returns:
+        List of words without any special characters
+    """
+    return re.findall(r'\w+', string)
+
+
+def search(query: Query, id_column: Column, string: str) -> Query:
+    """Filters locations matching the search string, best matches first.
+
+    Locations containing all the words (or words starting with them) from
+    the search string are matched.
+
+    Args:
+        query: SQL query for locations
+        id_column: Location ID column to join the index with
+        string: Search string as entered by user
+    Returns:
+        Filtered query
+    """
+    terms = get_terms(string)
+    if not terms:
+        return query.filter(false())
+
+    if db.engine.dialect.name == 'sqlite':
+        weights = ', '.join(str(weight) for weight in SQLITE_WEIGHTS)
+        return query.join(
+            _sqlite_table, _sqlite_table.c.rowid == id_column
+        ).filter(
+            text('location_search MATCH :search').bindparams(
+                search=' '.join(f'"{term}"*' for term in terms))
+        ).order_by(text(f'bm25(location_search, {weights})'))
+
+    score = match(_mysql_table.c.name, _mysql_table.c.description,
+                  _mysql_table.c.about, _mysql_table.c.categories,
+                  against=' '.join(f'+{term}*' for term in terms)
+                  ).in_boolean_mode()
+    return query.join(
+        _mysql_table, _mysql_table.c.location_id == id_column
+    ).filter(score).order_by(score.desc())
+
+
+def update(connection: Connection, location_ids: Iterable[int]) -> None:
+    """Updates index of given locations.
+
+    Args:
+        connection: Database connection to use (e.g. of current session)
+        location_ids: IDs of the locations to be (re)indexed
+    """
+    dialect = connection.dialect.name
+    if dialect not in SUPPORTED_DIALECTS:
+        return
+    location_ids = list(location_ids)
+    remove(connection, location_ids)
+    sql = _INSERT_SQLITE if dialect == 'sqlite' else _INSERT_MYSQL
+    connection.execute(text(sql).bindparams(
+        bindparam('ids', expanding=True)), {'ids': location_ids})
+
+
+def remove(connection: Connection, location_ids: Iterable[int]) -> None:
+    """Removes given locations from index.
+
+    Args:
+        connection: Database connection to use (e.g. of current session)
+        location_ids: IDs of the locations to be removed
+    """
+    dialect = connection.dialect.name
+    if dialect not in SUPPORTED_DIALECTS:
+        return
+    sql = _DELETE_SQLITE if dialect == 'sqlite' else _DELETE_MYSQL
+    connection.execute(text(sql).bindparams(
+        bindparam('ids', expanding=True)), {'ids': list(location_ids)})
@@ -1,16 +1,23 @@
 """Upload models."""
 import os
 import uuid
-from typing import Optional
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple, cast
 from datetime import datetime
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
 from werkzeug.utils import secure_filename
 from werkzeug.datastructures import FileStorage
-from flask import current_app as app
+from werkzeug.local import LocalProxy
+from flask import Flask, current_app as app, url_for
 from flask_babel import lazy_gettext as _
 
 from app.database import DBItem, db, UUID, IntEnum
 from app.utils.enums import StringEnum
-from app.utils.image import Img
+from app.utils.image import Img, process_image, get_supported_formats
 
 
 # DB strings lengths
@@ -30,16 +37,28 @@ class UploadType(StringEnum):
     DOCUMENT = _("Document")
 
 
+class UploadState(StringEnum):
+    """Processing state of the uploaded file."""
+    READY = _("Ready")
+    PROCESSING = _("Processing")
+    FAILED = _("Failed")
+
+
 class Upload(DBItem):
     """Uploads model.
 
     The uploaded file is stored in a selected folder with in a UUID.extension
     format. This way the filename conflicts are reduced.
+
+    The uploaded images are stored unchanged first, they are reduced and
+    thumbnailed by image_processor once the upload is commited.
     """
     name = db.Column(db.String(MAX_NAME_LEN), nullable=False)
     description = db.Column(db.String(MAX_DESCRIPTION_LEN))
     type = db.Column(IntEnum(UploadType), nullable=False)
     path = db.Column(db.String(MAX_PATH_LEN), nullable=False)
+    state = db.Column(IntEnum(UploadState), default=UploadState.READY,
+                      nullable=False)
     created = db.Column(db.DateTime(), default=datetime.utcnow, nullable=False)
 
     # Object UUID that is related to this file
@@ -51,26 +70,31 @@ class Upload(DBItem):
     def _delete_file(self):
         """Deletes files related to this object."""
         delete_file(self.path)
-        delete_file(self.thumbnail)
-
-    def _make_thumbnail(self):
-        """Creates thumbnail."""
-        dest = get_full_path(self.thumbnail)
-        img = Img(get_full_path(self.path))
-        img.thumbnail(dest, app.config['THUMBNAIL_SIZE_PX'])
+        for thumbnail, _size in get_srcset(self.path):
+            delete_file(thumbnail)
+            for variant in get_variant_paths(thumbnail):
+                delete_file(variant)
 
     def _save_file(self, file: FileStorage, subfolder: str):
         """Stores file to uploads dir, resize if needed
 
+        The images are processed synchronously if IMAGE_WORKERS is 0,
+        otherwise after the commit by the image_processor.
+
         Args:
             file: Uploaded file handle
             subfolder: Subfolder under uploads dir to write to
         """
-        is_img = self.type in (UploadType.PHOTO, UploadType.HISTORICAL_PHOTO)
-        self.path = save_uploaded_file(file, subfolder, str(uuid.uuid4()),
-                                       is_img)
-        if is_img:
-            self._make_thumbnail()
+        self.path = save_uploaded_file(file, subfolder, str(uuid.uuid4()))
+        self.state = UploadState.READY
+        if self.type not in (UploadType.PHOTO, UploadType.HISTORICAL_PHOTO):
+            return
+
+        if not app.config['IMAGE_WORKERS']:
+            process_upload(self.path)
+        else:
+            self.state = UploadState.PROCESSING
+            db.session.info.setdefault('images', []).append(self.path)
 
     def delete(self):
         """Deletes file from drive and database."""
@@ -110,11 +134,268 @@ class Upload(DBItem):
         """
         return cls.query.filter(cls.type == upload_type)
 
+    @classmethod
+    def get_photos(cls):
+        """Gets query for all uploaded images."""
+        return cls.query.filter(cls.type.in_(
+            [UploadType.PHOTO, UploadType.HISTORICAL_PHOTO]))
+
+    @classmethod
+    def get_unprocessed(cls):
+        """Gets query for images waiting for processing or failed."""
+        return cls.query.filter(cls.state != UploadState.READY)
+
     @property
     def thumbnail(self):
         """Returns relative path to thumbnail"""
-        img_dir, name = os.path.split(self.path)
+        return get_thumbnail_path(self.path)
+
+    @property
+    def srcset(self) -> List[Tuple[str, int]]:
+        """Returns relative paths to thumbnails of all sizes."""
+        return get_srcset(self.path)
+
+    def get_thumbnail(self, size: int) -> str:
+        """Gets relative path to the smallest thumbnail of adequate size.
+
+        Args:
+            size: Size the thumbnail is shown at
+        """
+        return get_thumbnail_path(self.path, size)
+
+
+class ImageProcessor:
+    """Processes the uploaded images in a pool of worker processes.
+
+    Each process (e.g. gunicorn worker) runs its own pool of IMAGE_WORKERS
+    processes, the state of the upload is updated once the processing
+    ends. The pool is recreated once broken (e.g. a worker was killed
+    for running out of memory). Images waiting in the pool are lost on
+    restart, they can be processed later by the `flask upload process`
+    command.
+    """
+
+    def __init__(self) -> None:
+        """Initializes the processor, the pool is started on demand."""
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def submit(self, flask_app: Flask, path: str) -> None:
+        """Adds the stored image to the processing queue.
+
+        Args:
+            flask_app: Flask application to update the upload for
+            path: Relative path to the image (from uploads folder)
+        """
+        args = (get_full_path(path), get_image_sizes(path),
+                get_image_variants(path))
+        with self._lock:
+            try:
+                future = self._get_pool(flask_app).submit(process_image,
+                                                          *args)
+            except BrokenProcessPool:
+                flask_app.logger.warning('Image processing pool is broken, '
+                                         'starting a new one')
+                cast(ProcessPoolExecutor, self._pool).shutdown(wait=False)
+                self._pool = None
+                future = self._get_pool(flask_app).submit(process_image,
+                                                          *args)
+        future.add_done_callback(
+            lambda future: self._finish(flask_app, path, future))
+
+    def _get_pool(self, flask_app: Flask) -> ProcessPoolExecutor:
+        """Gets the pool of this process, starts it if not running yet."""
+        # pools of the parent process are not usable after fork
+        if self._pool is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            # forking the threaded web server worker is not safe
+            self._pool = ProcessPoolExecutor(
+                flask_app.config['IMAGE_WORKERS'],
+                mp_context=multiprocessing.get_context('forkserver'))
+        return self._pool
+
+    def shutdown(self) -> None:
+        """Waits for the images being processed and stops the pool."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None and self._pid == os.getpid():
+            pool.shutdown()
+
+    @staticmethod
+    def _finish(flask_app: Flask, path: str, future: Future) -> None:
+        """Stores the processing result to the upload."""
+        state = UploadState.READY
+        if future.exception() is not None:
+            state = UploadState.FAILED
+            flask_app.logger.error(
+                f'Failed to process image {path}: {future.exception()}')
+
+        with flask_app.app_context():
+            db.session.execute(update(Upload.__table__).where(
+                Upload.path == path).values(state=state))
+            db.session.commit()
+
+
+image_processor = ImageProcessor()
+
+
+@event.listens_for(Session, 'after_commit')
+def _process_images(session) -> None:
+    """Passes images stored by the commited transaction to processing.
+
+    The transaction is committed already, so failures are only logged, the
+    images are left for the `flask upload process` command.
+    """
+    paths = session.info.pop('images', [])
+    if not paths:
+        return
+    # current_app is typed as Flask, it's a proxy to the app in fact
+    flask_app = cast(LocalProxy, app)._get_current_object()
+    for path in paths:
+        try:
+            image_processor.submit(flask_app, path)
+        except Exception:  # pylint: disable=broad-except
+            flask_app.logger.exception(
+                f'Failed to pass image {path} to processing')
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_images(session) -> None:
+    """Forgets images stored by the rolled back transaction."""
+    session.info.pop('images', None)
+
+
+def process_upload(path: str, reduce: bool = True) -> None:
+    """Reduces size of the uploaded image and creates its thumbnails.
+
+    Args:
+        path: Relative path to the image (from uploads folder)
+        reduce: Reduce the image itself to IMAGE_MAX_SIZE_PX
+    """
+    process_image(get_full_path(path), get_image_sizes(path, reduce),
+                  get_image_variants(path))
+
+
+def get_image_sizes(path: str,
+                    reduce: bool = True) -> Dict[str, Tuple[int, int]]:
+    """Gets sizes of the images made from the uploaded image.
+
+    The thumbnails are bounded by width only (up to IMAGE_MAX_SIZE_PX in
+    height), so their width matches the srcset width descriptor.
+
+    Args:
+        path: Relative path to the image (from uploads folder)
+        reduce: Include the image itself reduced to IMAGE_MAX_SIZE_PX
+    Returns:
+        Full path to max width and height mapping
+    """
+    max_size = app.config['IMAGE_MAX_SIZE_PX']
+    sizes = {get_full_path(thumbnail): (size, max_size)
+             for thumbnail, size in get_srcset(path)}
+    if reduce:
+        sizes[get_full_path(path)] = (max_size, max_size)
+    return sizes
+
+
+def get_image_variants(path: str) -> Dict[str, List[str]]:
+    """Gets variants in other formats of the images made from the image.
+
+    Args:
+        path: Relative path to the image (from uploads folder)
+    Returns:
+        Full path to the thumbnail to full paths of its variants mapping
+    """
+    return {get_full_path(thumbnail): [get_full_path(variant) for variant
+                                       in get_variant_paths(thumbnail)]
+            for thumbnail, _size in get_srcset(path)}
+
+
+def get_variant_paths(path: str) -> List[str]:
+    """Gets paths to variants of the thumbnail in THUMBNAIL_FORMATS.
+
+    Only the formats supported by Pillow are used, in order of preference.
+
+    Args:
+        path: Relative path to the thumbnail (from uploads folder)
+    """
+    formats = get_supported_formats(tuple(app.config['THUMBNAIL_FORMATS']))
+    return [f'{path}.{fmt}' for fmt in formats]
+
+
+def _get_thumbnail_sizes() -> List[int]:
+    """Gets all configured thumbnail sizes in ascending order."""
+    return sorted(set(app.config['THUMBNAIL_SIZES_PX']) |
+                  {app.config['THUMBNAIL_SIZE_PX']})
+
+
+def get_thumbnail_path(path: str, size: Optional[int] = None) -> str:
+    """Gets path to thumbnail of an uploaded image.
+
+    The THUMBNAIL_SIZE_PX thumbnail is stored in the thumbnail folder next
+    to the image, other sizes in its subfolders named by the size.
+
+    Args:
+        path: Relative path to the image (from uploads folder)
+        size: Size the thumbnail is shown at, the smallest adequate one is
+            chosen, THUMBNAIL_SIZE_PX if not set
+    Returns:
+        Relative path to the thumbnail
+    """
+    sizes = _get_thumbnail_sizes()
+    if size is None:
+        size = app.config['THUMBNAIL_SIZE_PX']
+    else:
+        size = next((item for item in sizes if item >= size), sizes[-1])
+
+    img_dir, name = os.path.split(path)
+    if size == app.config['THUMBNAIL_SIZE_PX']:
         return os.path.join(img_dir, 'thumbnail', name)
+    return os.path.join(img_dir, 'thumbnail', str(size), name)
+
+
+def get_default_thumbnail_path(path: str) -> str:
+    """Gets path to the THUMBNAIL_SIZE_PX thumbnail from path of any size.
+
+    Args:
+        path: Relative path to the thumbnail (from uploads folder)
+    """
+    thumbnail_dir, name = os.path.split(path)
+    if os.path.basename(thumbnail_dir).isdigit():
+        thumbnail_dir = os.path.dirname(thumbnail_dir)
+    return os.path.join(thumbnail_dir, name)
+
+
+def get_srcset(path: str) -> List[Tuple[str, int]]:
+    """Gets thumbnails of all sizes of an uploaded image.
+
+    Args:
+        path: Relative path to the image (from uploads folder)
+    Returns:
+        Relative path to the thumbnail and its max width, ordered by size
+    """
+    return [(get_thumbnail_path(path, size), size)
+            for size in _get_thumbnail_sizes()]
+
+
+def get_srcset_attr(path: str) -> str:
+    """Gets srcset attribute of img tag showing an uploaded image.
+
+    Args:
+        path: Relative path to the image (from uploads folder)
+    """
+    return ', '.join(f"{url_for('upload.get', path=thumbnail)} {size}w"
+                     for thumbnail, size in get_srcset(path))
+
+
+def is_thumbnail_path(path: str) -> bool:
+    """Checks if the path points to a thumbnail of an uploaded image.
+
+    Args:
+        path: Relative path to the file (from uploads folder)
+    """
+    path = os.path.dirname(get_default_thumbnail_path(path))
+    return os.path.basename(path) == 'thumbnail'
 
 
 def get_full_path(path: str) -> str:
@@ -1,15 +1,19 @@
 """User related models."""
-from typing import Optional
-from time import time
+import threading
+from typing import Any, Dict, List, Optional, cast
+from time import time, monotonic
 from datetime import datetime, timedelta
 import jwt
-from sqlalchemy import or_
-from sqlalchemy.orm import Query, backref
-from flask import request, current_app as app
+from sqlalchemy import or_, update, bindparam, inspect
+from sqlalchemy.orm import Query, backref, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from werkzeug.local import LocalProxy
+from flask import Flask, request, current_app as app
 from flask_login import UserMixin
 from flask_babel import lazy_gettext as _
 
-from app.database import DBItem, db, IntEnum
+from app.database import DBItem, db, IntEnum, on_commit
+from app.utils.cache import Cache
 from app.utils.enums import StringEnum
 from app.extensions import bcrypt
 from app.utils.geolocation import GeoIp
@@ -23,6 +27,14 @@ MAX_EMAIL_LEN = 128
 MAX_ABOUT_LEN = 10000
 MAX_REASON_LEN = 1024
 
+# Max age of cached logged in users in seconds, i.e. how long a ban or role
+# change made by other processes (e.g. gunicorn workers) may go unnoticed
+USER_CACHE_TTL = 60
+# Max amount of cached logged in users
+USER_CACHE_SIZE = 1000
+
+_user_cache = Cache(ttl=USER_CACHE_TTL, max_size=USER_CACHE_SIZE)
+
 
 class LoginResult(StringEnum):
     """Error codes for user tried to login event. """
@@ -151,6 +163,39 @@ class User(DBItem, UserMixin):
             return None
         return user, email
 
+    @classmethod
+    def get_logged_in(cls, user_id: int) -> Optional['User']:
+        """Gets user of the login session.
+
+        Columns of the user and the ban state are cached, the cached user
+        is attached to the current session without any query.
+
+        Args:
+            user_id: ID of the logged in user
+        Returns:
+            User or None if the user doesn't exist or is banned
+        """
+        missing = object()
+        values: Optional[Dict[str, Any]] = _user_cache.get(user_id, missing)
+        if values is missing:
+            user: Optional[User] = cls.get_by_id(user_id)
+            if user is None or user.banned:
+                _user_cache.set(user_id, None)
+                return None
+            _user_cache.set(user_id, {
+                attr.key: getattr(user, attr.key)
+                for attr in inspect(cls).column_attrs})
+            return user
+
+        if values is None:
+            return None
+        cached = cls()
+        for key, value in values.items():
+            setattr(cached, key, value)
+        make_transient_to_detached(cached)
+        merged: User = db.session.merge(cached, load=False)
+        return merged
+
     @property
     def banned(self) -> bool:
         """Checks if the user is currently banned."""
@@ -195,8 +240,16 @@ class User(DBItem, UserMixin):
         return bool(bcrypt.check_password_hash(self.password, password))
 
     def update_last_seen(self) -> None:
-        """Updates last seen record to current time. """
-        self.last_seen = datetime.utcnow()
+        """Updates last seen record to current time.
+
+        The object is not marked as modified, the time is stored to
+        database later together with other users by last_seen_buffer.
+        """
+        now = datetime.utcnow()
+        set_committed_value(self, 'last_seen', now)
+        # current_app is typed as Flask, it's a proxy to the app in fact
+        last_seen_buffer.add(cast(LocalProxy, app)._get_current_object(),
+                             self.id, now)
 
     def get_ban(self):
         """Gets active ban entry if any"""
@@ -402,3 +455,96 @@ class LoginLog(DBItem):
             system=os,
             browser=browser,
             country=country)
+
+
+@on_commit(User, Ban)
+def _clear_user_cache(items: List[DBItem]) -> None:
+    """Drops cached users once users or their bans change."""
+    # pylint: disable=unused-argument
+    _user_cache.clear()
+
+
+class LastSeenBuffer:
+    """Collects last seen times of users to be stored in batches.
+
+    Each process (e.g. gunicorn worker) keeps its own buffer, the times are
+    written by a single UPDATE statement once the oldest one waits for
+    longer than LAST_SEEN_INTERVAL. The requests store the times when due,
+    a timer thread stores them if no other request comes in time.
+    """
+
+    def __init__(self) -> None:
+        """Initializes an empty buffer."""
+        self._pending: Dict[int, datetime] = {}
+        self._since: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Gets amount of users waiting to be stored."""
+        return len(self._pending)
+
+    def add(self, flask_app: Flask, user_id: int,
+            last_seen: datetime) -> None:
+        """Adds last seen time of the user to be stored.
+
+        Args:
+            flask_app: Flask application to store the time for
+            user_id: ID of the user
+            last_seen: Time the user was last seen
+        """
+        with self._lock:
+            if self._since is None:
+                self._since = monotonic()
+                self._start_timer(flask_app)
+            self._pending[user_id] = last_seen
+
+    def flush_if_due(self, interval: float) -> None:
+        """Stores the buffered times if the oldest one waits long enough.
+
+        Args:
+            interval: Max amount of seconds the time may stay unsaved
+        """
+        with self._lock:
+            due = self._since is not None and \
+                monotonic() - self._since >= interval
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Stores all buffered times and commits the current session."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._since = None
+        if not pending:
+            return
+
+        table = User.__table__
+        db.session.execute(
+            update(table).where(table.c.id == bindparam('user_id')).values(
+                last_seen=bindparam('seen')),
+            [{'user_id': user_id, 'seen': seen}
+             for user_id, seen in pending.items()])
+        db.session.commit()
+
+    def _start_timer(self, flask_app: Flask) -> None:
+        """Starts thread storing the times once the interval passes."""
+        interval = flask_app.config['LAST_SEEN_INTERVAL']
+        if interval <= 0:
+            # stored by the request itself
+            return
+        timer = threading.Timer(interval, self._flush_timed, args=(flask_app,))
+        timer.name = 'last-seen-flush'
+        timer.daemon = True
+        timer.start()
+
+    def _flush_timed(self, flask_app: Flask) -> None:
+        """Stores the buffered times from the timer thread."""
+        with flask_app.app_context():
+            try:
+                self.flush()
+            except Exception:  # pylint: disable=broad-except
+                db.session.rollback()
+                flask_app.logger.exception('Failed to store last seen times')
+
+
+last_seen_buffer = LastSeenBuffer()
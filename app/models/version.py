@@ -0,0 +1,128 @@
+"""Versions of data cached by all processes.
+
+Each process (e.g. gunicorn worker) keeps its own copy of the cached data.
+The version stored in database is increased with every change of the data,
+the processes compare it with the version of their copy to notice the copy
+is outdated.
+"""
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, \
+    Tuple
+from sqlalchemy import event, update, insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.database import DBItem, db, on_commit
+from app.utils.cache import Cache
+
+# Max age of loaded versions in seconds, i.e. how long the changes made by
+# other processes may go unnoticed
+VERSIONS_TTL = 1
+
+MAX_NAME_LEN = 32
+
+_versions_cache = Cache(ttl=VERSIONS_TTL)
+# (watched models, name of the version to increase on their change)
+_watched: List[Tuple[Tuple[type, ...], str]] = []
+
+
+class DataVersion(DBItem):
+    """Versions of the data cached by processes."""
+    name = db.Column(db.String(MAX_NAME_LEN), unique=True, nullable=False)
+    version = db.Column(db.Integer(), nullable=False, default=0)
+
+    @classmethod
+    def get_versions(cls) -> Dict[str, int]:
+        """Gets all data versions, loaded at most once per VERSIONS_TTL.
+
+        Returns:
+            Data name to version mapping
+        """
+        versions: Dict[str, int] = _versions_cache.get_or_set(
+            None, lambda: dict(cls.query.with_entities(cls.name,
+                                                       cls.version)))
+        return versions
+
+    @classmethod
+    def increase(cls, connection: Connection, names: Iterable[str]) -> None:
+        """Increases versions of the data.
+
+        Args:
+            connection: Database connection to use (e.g. of current session)
+            names: Names of the changed data
+        """
+        for name in names:
+            result = connection.execute(
+                update(cls.__table__).where(cls.name == name).values(
+                    version=cls.version + 1))
+            if result.rowcount == 0:
+                connection.execute(insert(cls.__table__).values(
+                    name=name, version=1))
+
+
+class VersionedCache:
+    """Process-wide cache of data invalidated by version stored in database.
+
+    Changes of the watched models increase the version in the same
+    transaction, the cached items are then reloaded by all processes. The
+    process making the change drops its items right after the commit.
+
+    Attributes:
+        name: Name of the data version
+    """
+
+    def __init__(self, name: str, *models: type,
+                 max_size: Optional[int] = None) -> None:
+        """Initializes the cache.
+
+        Args:
+            name: Name of the data version
+            models: Model classes the cached data are loaded from
+            max_size: Max amount of items to keep, None for unlimited
+        """
+        self.name = name
+        self._cache = Cache(max_size=max_size)
+        _watched.append((models, name))
+        on_commit(*models)(lambda items: self.clear())
+
+    def get_or_set(self, key: Hashable, creator: Callable[[], Any]) -> Any:
+        """Gets cached item, creates and stores it if missing or outdated.
+
+        Args:
+            key: Key of the item
+            creator: Function returning the value to be cached
+        """
+        version = DataVersion.get_versions().get(self.name, 0)
+        item = self._cache.get(key)
+        if item is None or item[0] != version:
+            item = (version, creator())
+            self._cache.set(key, item)
+        return item[1]
+
+    def clear(self) -> None:
+        """Removes all items from cache."""
+        self._cache.clear()
+
+
+@event.listens_for(Session, 'after_flush')
+def _increase_versions(session, flush_context) -> None:
+    """Increases versions of the data changed by the flush."""
+    # pylint: disable=unused-argument
+    changed = session.new | session.dirty | session.deleted
+    names = {name for models, name in _watched
+             if any(isinstance(item, models) for item in changed)}
+    if names:
+        DataVersion.increase(session.connection(), sorted(names))
+        session.info.setdefault('data_versions', set()).update(names)
+
+
+@event.listens_for(Session, 'after_commit')
+def _reload_versions(session) -> None:
+    """Forgets loaded versions once this process changed any of them."""
+    if session.info.pop('data_versions', None):
+        _versions_cache.clear()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_versions(session) -> None:
+    """Forgets versions changed in rolled back transaction."""
+    session.info.pop('data_versions', None)
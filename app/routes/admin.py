@@ -9,9 +9,9 @@ from flask_babel import _
 from app.database import db
 from app.utils.utils import redirect_return
 from app.utils.email import send_email
-from app.utils.pagination import Pagination
+from app.utils.pagination import Pagination, paginate
 from app.decorators import moderator, admin
-from app.models.location import Location, LocationType
+from app.models.location import Location, LocationType, LocationSummary
 from app.models.user import User, Invitation, LoginLog, InvitationState
 from app.models import event
 from app.models.event import EventLog
@@ -50,6 +50,10 @@ def locations(page: int = 1, location: Optional[str] = None):
         page: Page number for results pagination
         location: Location type (urbex, underground, private)
     """
+    # Commit before loading the list, commit would expire loaded items
+    current_user.location_check_ts = datetime.utcnow()
+    db.session.commit()
+
     if location is None:
         query = Location.get(LocationType.ALL)
         title = _("All locations")
@@ -65,19 +69,18 @@ def locations(page: int = 1, location: Optional[str] = None):
     else:
         abort(404)
 
-    query = query.paginate(page, app.config['ITEMS_PER_PAGE'], True)
+    query = paginate(Location.summarize(query), page,
+                     app.config['ITEMS_PER_PAGE'], query)
     pagination = Pagination(page, query.pages, 'admin.locations',
-                            location=location)
+                            location=location, approximate=query.approximate)
 
     locations_count = Location.get(LocationType.ALL).count()
     urbex_count = Location.get(LocationType.URBEX).count()
     underground_count = Location.get(LocationType.UNDERGROUND).count()
     private_count = Location.get_unpublished(LocationType.ALL).count()
 
-    current_user.location_check_ts = datetime.utcnow()
-    db.session.commit()
-
-    return render_template('admin/locations.html', locations=query.items,
+    return render_template('admin/locations.html',
+                           locations=LocationSummary.from_rows(query.items),
                            title=title, locations_count=locations_count,
                            underground_count=underground_count,
                            urbex_count=urbex_count,
@@ -111,8 +114,9 @@ def users(page: int = 1, role: Optional[str] = None):
     else:
         abort(404)
 
-    query = query.paginate(page, app.config['ITEMS_PER_PAGE'], True)
-    pagination = Pagination(page, query.pages, 'admin.users', role=role)
+    query = paginate(query, page, app.config['ITEMS_PER_PAGE'])
+    pagination = Pagination(page, query.pages, 'admin.users', role=role,
+                            approximate=query.approximate)
 
     users_count = User.get().count()
     admins_count = User.get_admins().count()
@@ -155,9 +159,9 @@ def invitations(page: int = 1, state: Optional[str] = None):
     else:
         abort(404)
 
-    query = query.paginate(page, app.config['ITEMS_PER_PAGE'], True)
+    query = paginate(query, page, app.config['ITEMS_PER_PAGE'])
     pagination = Pagination(page, query.pages, 'admin.invitations',
-                            state=state)
+                            state=state, approximate=query.approximate)
 
     waiting = Invitation.get_by_state(InvitationState.WAITING).count()
     approved = Invitation.get_by_state(InvitationState.APPROVED).count()
@@ -182,6 +186,9 @@ def logins(page: int = 1, login_type: Optional[str] = None):
         page: Page number for results pagination
         login_type: Login type (unique, failed)
     """
+    current_user.login_check_ts = datetime.utcnow()
+    db.session.commit()
+
     if login_type is None:
         query = LoginLog.get()
         title = _("Logins")
@@ -199,11 +206,9 @@ def logins(page: int = 1, login_type: Optional[str] = None):
     unique = LoginLog.get_unique().count()
     per_month = LoginLog.get_last_month().count()
 
-    query = query.paginate(page, app.config['ITEMS_PER_PAGE'], True)
-    pagination = Pagination(page, query.pages, 'admin.logins')
-
-    current_user.login_check_ts = datetime.utcnow()
-    db.session.commit()
+    query = paginate(query, page, app.config['ITEMS_PER_PAGE'])
+    pagination = Pagination(page, query.pages, 'admin.logins',
+                            approximate=query.approximate)
 
     return render_template('admin/logins.html', logins=query.items,
                            failed=failed, unique=unique, attempts=attempts,
@@ -263,14 +268,14 @@ def events(page: int = 1):
     Args:
         page: Page number for results pagination
     """
-    query = EventLog.get()
-
-    query = query.paginate(page, app.config['ITEMS_PER_PAGE'], True)
-    pagination = Pagination(page, query.pages, 'admin.events')
-
     current_user.event_check_ts = datetime.utcnow()
     db.session.commit()
 
+    query = EventLog.get()
+    query = paginate(query, page, app.config['ITEMS_PER_PAGE'])
+    pagination = Pagination(page, query.pages, 'admin.events',
+                            approximate=query.approximate)
+
     return render_template('admin/events.html', events=query.items,
                            pagination=pagination)
 
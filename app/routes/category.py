@@ -9,7 +9,7 @@ from app.database import db
 from app.decorators import moderator
 from app.utils.utils import redirect_return
 from app.forms.category import CategoryForm
-from app.models.location import Category
+from app.models.location import Category, Location, LocationSummary
 from app.models.upload import Upload, UploadType
 from app.models.event import EventLog
 from app.models import event
@@ -29,7 +29,10 @@ def show(category_id: int):
     category = Category.get_by_id(category_id)
     if not category:
         abort(404)
-    return render_template('category/category.html', category=category)
+    locations = LocationSummary.from_rows(
+        Location.summarize(category.locations))
+    return render_template('category/category.html', category=category,
+                           locations=locations)
 
 
 @blueprint.route('/add', methods=['GET', 'POST'])
@@ -2,7 +2,7 @@
 from flask import Blueprint, render_template
 from flask import current_app as app
 
-from app.utils.pagination import Pagination
+from app.utils.pagination import Pagination, paginate
 from app.models.upload import Upload, UploadType
 
 
@@ -17,8 +17,9 @@ def browse(page: int = 1):
     Args:
         page: Page for pagination
     """
-    query = Upload.get(UploadType.BOOK).paginate(
-        page, app.config['ITEMS_PER_PAGE'], True)
-    pagination = Pagination(page, query.pages, 'library.browse')
+    query = paginate(Upload.get(UploadType.BOOK), page,
+                     app.config['ITEMS_PER_PAGE'])
+    pagination = Pagination(page, query.pages, 'library.browse',
+                            approximate=query.approximate)
     return render_template('library/browse.html', books=query.items,
                            pagination=pagination)
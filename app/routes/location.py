@@ -1,25 +1,39 @@
 """Routes for locations."""
 import json
-from typing import Optional
+import hashlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 from flask import Blueprint, render_template, request, abort, redirect, \
-    url_for, flash
+    url_for, flash, g, make_response, stream_with_context
 from flask import current_app as app
 from flask_login import current_user
 from flask_babel import _
+from sqlalchemy.orm import Query
+from werkzeug.datastructures import FileStorage
+from werkzeug.http import is_resource_modified
 
-from app.database import db
+from app.database import db, count as cached_count
 from app.decorators import moderator
-from app.utils.pagination import Pagination
+from app.utils.pagination import Pagination, KeysetPagination, \
+    encode_cursor, decode_cursor, keyset_paginate, paginate
 from app.utils.utils import redirect_return, Url
+from app.utils.geolocation import BoundingBox
 from app.models.location import Location, Visit, Link, Bookmarks, POI,\
-    LocationType
+    LocationType, LocationSummary, DeletedLocation, LocationFilter, \
+    Country, Category, LOCATION_DETAILS
 from app.forms.location import VisitForm, LinkForm,\
     BookmarkForm, POIForm
-from app.models.upload import Upload, UploadType
+from app.models.upload import Upload, UploadType, get_thumbnail_path, \
+    get_srcset_attr
+from app.models.autocomplete import autocomplete as autocomplete_index, \
+    LOCATION
 from app.models import event
 from app.models.event import EventLog
 from app.models.user import User
+from app.models.version import VersionedCache
+from app.models.locations.underground import Underground
+from app.models.locations.urbex import Urbex
+from app.models.locations.hiking import Hiking
 from app.routes.locations import LocationUtil
 from app.forms.locations.underground import UndergroundForm
 from app.routes.locations.underground import UndergroundUtil
@@ -29,7 +43,22 @@ from app.forms.locations.hiking import HikingForm
 from app.routes.locations.hiking import HikingUtil
 
 
+# Amount of locations loaded from database at once during export
+EXPORT_BATCH_SIZE = 500
+
+# Query arguments filtering the locations
+FILTER_ARGS = ('country', 'category', 'state', 'accessibility', 'bbox')
+
 blueprint = Blueprint('location', __name__, url_prefix='/location')
+# published locations for the map, rebuilt by all processes once changed
+_map_cache = VersionedCache('map', Location, Upload, Underground, Urbex,
+                            Hiking)
+
+_type_strings = {
+    LocationType.UNDERGROUND: 'underground',
+    LocationType.URBEX: 'urbex',
+    LocationType.HIKING: 'hiking',
+}
 
 
 def _get_loc_type(type_string: Optional[str]) -> LocationType:
@@ -42,16 +71,220 @@ def _get_loc_type(type_string: Optional[str]) -> LocationType:
     """
     if type_string is None:
         return LocationType.ALL
-    if type_string == "underground":
-        return LocationType.UNDERGROUND
-    if type_string == "urbex":
-        return LocationType.URBEX
-    if type_string == "hiking":
-        return LocationType.HIKING
+    for loc_type, string in _type_strings.items():
+        if string == type_string:
+            return loc_type
     abort(404)
     return LocationType.ALL
 
 
+def _get_filter(loc_type: LocationType) -> LocationFilter:
+    """Gets location filter from the query arguments.
+
+    Values of the country, state and accessibility arguments are the enum
+    values, category is the category ID and bbox is the area in the
+    west,south,east,north format. Aborts with 400 on invalid values.
+
+    Args:
+        loc_type: Type of the locations being filtered
+    Returns:
+        Filter of the locations
+    """
+    args = _get_filter_args()
+    details = LOCATION_DETAILS.get(loc_type)
+    if details is None and ('state' in args or 'accessibility' in args):
+        abort(400)
+
+    try:
+        return LocationFilter(
+            country=Country.coerce(args.get('country', '')),
+            category=int(args['category']) if 'category' in args else None,
+            state=details[1].coerce(args['state'])
+            if details is not None and 'state' in args else None,
+            accessibility=details[2].coerce(args['accessibility'])
+            if details is not None and 'accessibility' in args else None,
+            area=BoundingBox.from_str(args['bbox'])
+            if 'bbox' in args else None)
+    except ValueError:
+        abort(400)
+    return LocationFilter()
+
+
+def _get_filter_args() -> Dict[str, str]:
+    """Gets query arguments of the location filter, e.g. for page links."""
+    return {name: request.args[name] for name in FILTER_ARGS
+            if request.args.get(name)}
+
+
+def _get_facets(loc_type: LocationType,
+                filters: LocationFilter) -> Dict[str, List[Dict[str, Any]]]:
+    """Gets facet counts of the locations visible to the user.
+
+    Args:
+        loc_type: Type of the locations
+        filters: Filters applied to the locations
+    Returns:
+        Facet name to list of options mapping, the option is a json
+        serializable record of query argument value, name and count
+    """
+    facets = Location.get_facets(loc_type, filters, current_user)
+    categories = {}
+    if facets['category']:
+        categories = dict(Category.query.filter(
+            Category.id.in_(facets['category'])
+        ).with_entities(Category.id, Category.name))
+    type_names = {
+        LocationType.UNDERGROUND: _('Underground'),
+        LocationType.URBEX: _('Urbex'),
+        LocationType.HIKING: _('Hiking'),
+    }
+
+    result = {}
+    for facet, counts in facets.items():
+        options = []
+        for value, count in counts.items():
+            if facet == 'type':
+                option = (_type_strings[value], type_names[value])
+            elif facet == 'category':
+                option = (value, categories.get(value, ''))
+            else:
+                option = (value.value, str(value))
+            options.append({'value': option[0], 'name': option[1],
+                            'count': count})
+        result[facet] = sorted(options, key=lambda option: option['name'])
+    return result
+
+
+def _get_map_location(location: LocationSummary) -> Dict[str, Any]:
+    """Gets location data for the map.
+
+    Args:
+        location: Location to get the data for
+    Returns:
+        Json serializable location record
+    """
+    srcset = ''
+    if location.photo_path:
+        image_url = Url.get('upload.get', path=get_thumbnail_path(
+            location.photo_path, app.config['MAP_THUMBNAIL_SIZE_PX']))
+        srcset = get_srcset_attr(location.photo_path)
+    else:
+        image_url = Url.get(
+            'static', filename='images/location_placeholder.png')
+
+    return {
+        'id': location.id,
+        'name': location.name,
+        'image': str(image_url),
+        'srcset': srcset,
+        'description': location.description,
+        'latitude': location.latitude,
+        'longitude': location.longitude,
+        'type': str(location.type),
+        'state': str(location.state or _('Undefined')),
+        'accessibility': str(location.accessibility or _('Undefined')),
+    }
+
+
+def _get_map_locations(query: Query) -> List[Dict[str, Any]]:
+    """Gets locations data for the map.
+
+    Args:
+        query: SQL query for locations
+    Returns:
+        List of json serializable location records
+    """
+    rows = Location.summarize(query)
+    return [_get_map_location(loc) for loc in LocationSummary.from_rows(rows)]
+
+
+def _get_published_map_locations(
+        loc_type: LocationType) -> List[Dict[str, Any]]:
+    """Gets map data of all published locations.
+
+    The data are the same for all users, they are cached per location type
+    and locale (translated names of types, states,...).
+
+    Args:
+        loc_type: Type of the locations
+    Returns:
+        List of json serializable location records
+    """
+    query = Location.get(loc_type).filter_by(published=True)
+    locations: List[Dict[str, Any]] = _map_cache.get_or_set(
+        (loc_type, g.locale), lambda: _get_map_locations(query))
+    return locations
+
+
+def _paginate(query: Query, *args, page: Optional[int] = None, **kwargs
+              ) -> Tuple[List[LocationSummary], Pagination]:
+    """Loads page of locations given by cursor query argument.
+
+    The locations are ordered by modification date, newest first. Keyset
+    pagination is used, so the deep pages are as fast as the first one.
+    The page number links created before are still served by offset
+    pagination. The total amount of locations is shown if enabled by
+    LOCATIONS_TOTAL, it's cached (see app.database.count).
+
+    Args:
+        query: SQL query for locations
+        page: Page number for the offset pagination, None for keyset one
+        Rest of the arguments is passed to url_for generator of page links
+    Returns:
+        Locations on the page and the pagination navigation
+    """
+    per_page = app.config['LOCATIONS_PER_PAGE']
+    summary = Location.summarize(query)
+    if page is not None:
+        result = paginate(summary.order_by(None).order_by(
+            Location.modified.desc(), Location.id.desc()), page, per_page,
+            query)
+        return (LocationSummary.from_rows(result.items),
+                Pagination(page, result.pages, *args,
+                           approximate=result.approximate, **kwargs))
+
+    try:
+        keyset_page = keyset_paginate(summary,
+                                      (Location.modified, Location.id),
+                                      per_page, request.args.get('cursor'))
+    except ValueError:
+        abort(400)
+    total = None
+    if app.config['LOCATIONS_TOTAL'] and \
+            (keyset_page.prev is not None or keyset_page.next is not None):
+        total = cached_count(query)
+    return (LocationSummary.from_rows(keyset_page.items),
+            KeysetPagination(keyset_page, *args, total=total, **kwargs))
+
+
+def _add_visit_photos(visit: Visit, location: Location,
+                      photos: Optional[List[FileStorage]]) -> None:
+    """Adds uploaded photos to the visit.
+
+    The photos are processed together by the image workers once the
+    visit is commited.
+
+    Args:
+        visit: Visit to add the photos to
+        location: Location of the visit
+        photos: Uploaded photos, the empty ones are skipped
+    """
+    if visit.uuid is None:
+        # the uuid of a new visit is generated by flush
+        db.session.flush()
+    for photo in photos or []:
+        if not photo:
+            continue
+        Upload.create(
+            file=photo,
+            subfolder=f'location/{ location.id }/visits',
+            name=_("Visit photo"),
+            type=UploadType.PHOTO,
+            created_by=current_user,
+            object_uuid=visit.uuid,
+        )
+
+
 @blueprint.route('/<int:location_id>', methods=['GET', 'POST'])
 def show(location_id: int):
     """Renders location record.
@@ -73,26 +306,17 @@ def show(location_id: int):
             visited_on=form.date.data,
             location=location,
             user_id=current_user.id)
+        _add_visit_photos(visit, location, form.photos.data)
         EventLog.log(current_user, event.AddVisitEvent(visit))
         db.session.commit()
 
-        if form.photos.data:
-            for photo in form.photos.data:
-                Upload.create(
-                    file=photo,
-                    subfolder=f'location/{ location.id }/visits',
-                    name=_("Visit photo"),
-                    type=UploadType.PHOTO,
-                    created_by=current_user,
-                    object_uuid=visit.uuid,
-                )
-            db.session.commit()
-
         flash(_("Your visit was saved"), 'success')
         return redirect(url_for('location.show', location_id=location.id))
 
+    bookmarked = Bookmarks.get_ids_with(current_user, location)
     return render_template('location/location.html', location=location,
-                           form=form, bookmark_form=bookmark_form)
+                           form=form, bookmark_form=bookmark_form,
+                           bookmarked=bookmarked)
 
 
 @blueprint.route('/add/<string:type_str>', methods=['GET', 'POST'])
@@ -127,6 +351,7 @@ def add(type_str: str):
             country=form.country.data,
             published=int(form.published.data),
             owner=current_user,
+            type=loc_type,
         )
         util.create(location, form)
         EventLog.log(current_user, event.CreateLocationEvent(location))
@@ -239,6 +464,8 @@ def edit(location_id: int):
 def search(string: str = None, page: int = 1):
     """Renders result of search in location names.
 
+    Private locations of other users are never found.
+
     Args:
         string: Search string
         page: Page number for results pagination
@@ -246,118 +473,139 @@ def search(string: str = None, page: int = 1):
     if request.method == 'POST':
         string = request.form.get('search')
 
-    query = Location.search(string).paginate(
-        page, app.config['LOCATIONS_PER_PAGE'], True)
+    search_query = Location.filter_private(Location.search(string),
+                                           current_user)
+    query = paginate(Location.summarize(search_query), page,
+                     app.config['LOCATIONS_PER_PAGE'], search_query)
     pagination = Pagination(page, query.pages, 'location.search',
-                            string=string)
+                            string=string, approximate=query.approximate)
 
-    return render_template('location/browse.html', locations=query.items,
+    return render_template('location/browse.html',
+                           locations=LocationSummary.from_rows(query.items),
                            pagination=pagination)
 
 
+@blueprint.route('/autocomplete')
+def autocomplete():
+    """Gets suggestions of location and category names in json.
+
+    The names having a word starting with the q query argument are returned,
+    diacritics and case are ignored.
+    """
+    prefix = request.args.get('q', '').strip()
+    if not prefix:
+        return json.dumps([])
+
+    results = []
+    for item in autocomplete_index.find(
+            prefix, current_user, app.config['AUTOCOMPLETE_LIMIT']):
+        if item.type == LOCATION:
+            url = Url.get('location.show', location_id=item.id)
+        else:
+            url = Url.get('category.show', category_id=item.id)
+        results.append({'type': item.type, 'name': item.name,
+                        'url': str(url)})
+    return json.dumps(results)
+
+
 @blueprint.route('/mine/<string:type_str>')
 @blueprint.route('/mine/<string:type_str>/<int:page>')
-def owned(type_str: str, page: int = 1):
+def owned(type_str: str, page: Optional[int] = None):
     """Renders locations owned by current user.
 
     Args:
         type_str: Type of the location
-        page: Page number for results pagination
+        page: Page number for offset pagination (see _paginate)
     """
     loc_type = _get_loc_type(type_str)
-    query = Location.get_by_owner(loc_type, current_user).paginate(
-        page, app.config['LOCATIONS_PER_PAGE'], True)
-    pagination = Pagination(page, query.pages, 'location.owned',
-                            type_str=type_str)
+    query = Location.get_by_owner(loc_type, current_user)
+    locations, pagination = _paginate(query, 'location.owned',
+                                      type_str=type_str, page=page)
 
-    return render_template('location/browse.html', locations=query.items,
+    return render_template('location/browse.html', locations=locations,
                            pagination=pagination)
 
 
 @blueprint.route('/user/<int:user_id>')
 @blueprint.route('/user/<int:user_id>/<int:page>')
-def by_user(user_id: int, page: int = 1):
+def by_user(user_id: int, page: Optional[int] = None):
     """Renders locations owned by given user.
 
     Args:
         user_id: ID of the user
-        page: Page number for results pagination
+        page: Page number for offset pagination (see _paginate)
     """
     user = User.get_by_id(user_id)
     if not user:
         abort(404)
 
     query = Location.get_by_owner(LocationType.ALL, user)
-    query = Location.filter_private(query, current_user).paginate(
-        page, app.config['LOCATIONS_PER_PAGE'], True)
-    pagination = Pagination(page, query.pages, 'location.by_user',
-                            user_id=user_id)
+    query = Location.filter_private(query, current_user)
+    locations, pagination = _paginate(query, 'location.by_user',
+                                      user_id=user_id, page=page)
 
-    return render_template('location/browse.html', locations=query.items,
+    return render_template('location/browse.html', locations=locations,
                            pagination=pagination)
 
 
 @blueprint.route('/visited/<string:type_str>')
 @blueprint.route('/visited/<string:type_str>/<int:page>')
-def visited(type_str: str, page: int = 1):
+def visited(type_str: str, page: Optional[int] = None):
     """Renders locations visited by currentuser.
 
     Args:
         type_str: Type of the location
-        page: Page number for results pagination
+        page: Page number for offset pagination (see _paginate)
     """
     loc_type = _get_loc_type(type_str)
-    query = Location.get_unique_visits(loc_type, current_user).paginate(
-        page, app.config['LOCATIONS_PER_PAGE'], True)
-    pagination = Pagination(page, query.pages, 'location.visited',
-                            type_str=type_str)
+    query = Location.get_unique_visits(loc_type, current_user)
+    locations, pagination = _paginate(query, 'location.visited',
+                                      type_str=type_str, page=page)
 
-    return render_template('location/browse.html', locations=query.items,
+    return render_template('location/browse.html', locations=locations,
                            pagination=pagination)
 
 
 @blueprint.route('/user/visited/<int:user_id>')
 @blueprint.route('/user/visited/<int:user_id>/<int:page>')
-def visited_by_user(user_id: int, page: int = 1):
+def visited_by_user(user_id: int, page: Optional[int] = None):
     """Renders locations visited by given user.
 
     Args:
         user_id: ID of the user
-        page: Page number for results pagination
+        page: Page number for offset pagination (see _paginate)
     """
     user = User.get_by_id(user_id)
     if not user:
         abort(404)
 
     query = Location.get_unique_visits(LocationType.ALL, user)
-    query = Location.filter_private(query, current_user).paginate(
-        page, app.config['LOCATIONS_PER_PAGE'], True)
-    pagination = Pagination(page, query.pages, 'location.visited_by_user',
-                            user_id=user_id)
+    query = Location.filter_private(query, current_user)
+    locations, pagination = _paginate(query, 'location.visited_by_user',
+                                      user_id=user_id, page=page)
 
-    return render_template('location/browse.html', locations=query.items,
+    return render_template('location/browse.html', locations=locations,
                            pagination=pagination)
 
 
 @blueprint.route('/bookmarks/<string:name>')
 @blueprint.route('/bookmarks/<string:name>/<int:page>')
-def bookmark_show(name: str, page: int = 1):
+def bookmark_show(name: str, page: Optional[int] = None):
     """Renders locations visited by user.
 
     Args:
         name: Name of the bookmark
-        page: Page number for results pagination
+        page: Page number for offset pagination (see _paginate)
     """
     bookmarks = Bookmarks.get_by_name(current_user, name)
     if not bookmarks:
         abort(404)
 
-    query = bookmarks.locations.paginate(
-        page, app.config['LOCATIONS_PER_PAGE'], True)
-    pagination = Pagination(page, query.pages, 'location.bookmarks',
-                            name=name)
+    locations, pagination = _paginate(bookmarks.locations,
+                                      'location.bookmark_show', name=name,
+                                      page=page)
 
-    return render_template('location/browse.html', locations=query.items,
+    return render_template('location/browse.html', locations=locations,
                            pagination=pagination)
 
 
@@ -365,21 +613,28 @@ def bookmark_show(name: str, page: int = 1):
 @blueprint.route('/browse/<int:page>')
 @blueprint.route('/browse/<string:type_str>')
 @blueprint.route('/browse/<string:type_str>/<int:page>')
-def browse(type_str: Optional[str] = None, page: int = 1):
+def browse(type_str: Optional[str] = None, page: Optional[int] = None):
     """Renders all locations
 
+    The locations can be filtered by the query arguments (see _get_filter),
+    counts of locations per filter value are shown next to the options.
+
     Args:
         type: Type of the location
-        page: Page number for results pagination
+        page: Page number for offset pagination (see _paginate)
     """
     loc_type = _get_loc_type(type_str)
-    query = Location.filter_private(Location.get(loc_type), current_user)
-    query = query.paginate(page, app.config['LOCATIONS_PER_PAGE'], True)
+    filters = _get_filter(loc_type)
+    query = Location.filter_by(
+        Location.filter_private(Location.get(loc_type), current_user),
+        loc_type, filters)
+    locations, pagination = _paginate(query, 'location.browse',
+                                      type_str=type_str, page=page,
+                                      **_get_filter_args())
 
-    pagination = Pagination(page, query.pages, 'location.browse',
-                            type_str=type_str)
-    return render_template('location/browse.html', locations=query.items,
-                           pagination=pagination)
+    return render_template('location/browse.html', locations=locations,
+                           pagination=pagination, type_str=type_str,
+                           facets=_get_facets(loc_type, filters))
 
 
 @blueprint.route('/visit/edit/<int:visit_id>', methods=['GET', 'POST'])
@@ -400,16 +655,7 @@ def visit_edit(visit_id: int):
     elif form.validate_on_submit():
         visit.comment = form.comment.data
         visit.visited_on = form.date.data
-        if form.photos.data:
-            for photo in form.photos.data:
-                Upload.create(
-                    file=photo,
-                    subfolder=f'location/{ visit.location.id }/visits',
-                    name=_("Visit photo"),
-                    type=UploadType.PHOTO,
-                    created_by=current_user,
-                    object_uuid=visit.uuid,
-                )
+        _add_visit_photos(visit, visit.location, form.photos.data)
         EventLog.log(current_user, event.ModifyVisitEvent(visit))
         db.session.commit()
         flash(_("Visit was saved"), 'success')
@@ -661,48 +907,184 @@ def browse_map(type_str: Optional[str] = None):
     return render_template('location/map.html', loc_type=type_str)
 
 
+def _get_api_data(loc_type: LocationType, filters: LocationFilter,
+                  zoom: Optional[int], with_facets: bool = False) -> str:
+    """Gets locations or clusters of locations for the map in json.
+
+    Args:
+        loc_type: Type of the locations
+        filters: Filters of the locations (e.g. area)
+        zoom: Map zoom level, None if unknown
+        with_facets: Add facet counts of the locations to the result
+    """
+    area = filters.area
+    extra = {}
+    if with_facets:
+        extra['facets'] = _get_facets(loc_type, filters)
+    if zoom is not None and zoom <= app.config['MAP_CLUSTER_MAX_ZOOM']:
+        clusters = Location.get_clusters(loc_type, zoom, current_user, area,
+                                         filters)
+        return json.dumps({'clusters': [{
+            'latitude': cluster.latitude,
+            'longitude': cluster.longitude,
+            'count': cluster.count,
+        } for cluster in clusters], **extra})
+
+    if filters.has_attributes():
+        query = Location.filter_by(
+            Location.filter_private(Location.get(loc_type), current_user),
+            loc_type, filters)
+        return json.dumps({'locations': _get_map_locations(query),
+                           **extra})
+
+    results = _get_published_map_locations(loc_type)
+    if area:
+        results = [loc for loc in results
+                   if area.contains(loc['latitude'], loc['longitude'])]
+
+    query = Location.get(loc_type).filter_by(published=False,
+                                             owner=current_user)
+    if area:
+        query = Location.filter_area(query, area)
+    results = _get_map_locations(query) + results
+
+    return json.dumps({'locations': results, **extra})
+
+
 @blueprint.route('/api')
 @blueprint.route('/api/<string:type_str>')
 def api(type_str: Optional[str] = None):
     """Gets locations in json.
 
+    Optional bbox query argument (west,south,east,north in decimal degrees)
+    limits the results to locations in the given area (e.g. map viewport).
+    When the zoom argument is set to a low zoom level, clusters of locations
+    are returned instead of individual locations. The locations can be
+    filtered by the country, category, state and accessibility arguments,
+    facet counts of the filtered locations are part of the response if the
+    facets argument is set to 1 (they can't be cached for the map areas).
+
+    The response carries ETag derived from the locations visible to the
+    user, unchanged data are answered by 304 without loading the locations.
+    Last-Modified is not sent, removed locations don't change the date.
+
     Args:
         type_str: type of the location (urbex, underground,...)
     """
-    query = Location.get(_get_loc_type(type_str))
-    locations = Location.filter_private(query, current_user).all()
-    results = []
+    loc_type = _get_loc_type(type_str)
+    filters = _get_filter(loc_type)
+
+    zoom = None
+    if 'zoom' in request.args:
+        zoom = request.args.get('zoom', type=int)
+        if zoom is None or zoom < 0:
+            abort(400)
+
+    count, last_modified = Location.get_version(loc_type, current_user)
+    version = f'{current_user.id}:{g.locale}:{count}:{last_modified}:' \
+        f'{request.query_string.decode()}'
+    etag = hashlib.sha1(version.encode()).hexdigest()
+
+    if is_resource_modified(request.environ, etag):
+        response = make_response(_get_api_data(
+            loc_type, filters, zoom, request.args.get('facets') == '1'))
+    else:
+        response = make_response('', 304)
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+@blueprint.route('/changes')
+@blueprint.route('/changes/<string:type_str>')
+def changes(type_str: Optional[str] = None):
+    """Gets locations changed since the cursor in json.
+
+    Returns the added or modified locations and IDs of the locations that
+    were deleted or are no longer visible to the user. The response
+    contains a cursor to be passed in the cursor query argument of the
+    next request and a flag telling if there are more changes to fetch.
+    All locations are returned if no cursor is given.
+
+    Args:
+        type_str: type of the location (urbex, underground,...)
+    """
+    loc_type = _get_loc_type(type_str)
+    limit = app.config['CHANGES_PER_PAGE']
+
+    modified, location_id = None, 0
+    if 'cursor' in request.args:
+        try:
+            modified, location_id, deleted_id = decode_cursor(
+                request.args['cursor'])
+            if modified is not None:
+                modified = datetime.fromisoformat(modified)
+            location_id = int(location_id)
+            deleted_id = int(deleted_id)
+        except (ValueError, TypeError):
+            abort(400)
+    else:
+        deleted_id = DeletedLocation.get_last_id()
+
+    query = Location.get_modified_since(loc_type, modified, location_id)
+    rows = Location.summarize(query).limit(limit + 1).all()
+    locations = LocationSummary.from_rows(rows[:limit])
+    deletions = DeletedLocation.get_since(deleted_id).limit(limit + 1).all()
 
+    results = []
+    deleted = []
     for location in locations:
-        if location.photo:
-            image_url = Url.get('upload.get', path=location.photo.thumbnail)
+        if location.published or location.owner_id == current_user.id:
+            results.append(_get_map_location(location))
         else:
-            image_url = Url.get(
-                'static', filename='images/location_placeholder.png')
-
-        if location.underground:
-            loc_type = location.underground.type
-            loc_state = location.underground.state
-            loc_accessibility = location.underground.accessibility
-        elif location.urbex:
-            loc_type = location.urbex.type
-            loc_state = location.urbex.state
-            loc_accessibility = location.urbex.accessibility
-        elif location.hiking:
-            loc_type = location.hiking.type
-            loc_state = _('Undefined')
-            loc_accessibility = _('Undefined')
-
-        results.append({
-            'id': location.id,
-            'name': location.name,
-            'image': str(image_url),
-            'description': location.description,
-            'latitude': location.latitude.value,
-            'longitude': location.longitude.value,
-            'type': str(loc_type),
-            'state': str(loc_state),
-            'accessibility': str(loc_accessibility),
-        })
-
-    return json.dumps({'locations': results})
+            deleted.append(location.id)
+    deleted += [deletion.location_id for deletion in deletions[:limit]]
+
+    if locations:
+        modified, location_id = locations[-1].modified, locations[-1].id
+    if deletions:
+        deleted_id = deletions[:limit][-1].id
+    if modified is not None:
+        modified = modified.isoformat()
+
+    return json.dumps({
+        'locations': results,
+        'deleted': deleted,
+        'cursor': encode_cursor(modified, location_id, deleted_id),
+        'more': len(rows) > limit or len(deletions) > limit,
+    })
+
+
+@blueprint.route('/export')
+@blueprint.route('/export/<string:type_str>')
+def export(type_str: Optional[str] = None):
+    """Exports all locations visible to the user in json.
+
+    The data are in the same format as the api ones, but they are streamed
+    to the client while being loaded from database in batches, the memory
+    usage doesn't depend on the amount of locations.
+
+    Args:
+        type_str: type of the location (urbex, underground,...)
+    """
+    loc_type = _get_loc_type(type_str)
+    query = Location.filter_private(Location.get(loc_type), current_user)
+    query = Location.summarize(query).yield_per(EXPORT_BATCH_SIZE)
+
+    def generate() -> Iterator[str]:
+        yield '{"locations": ['
+        separator = ''
+        batch = []
+        for row in query:
+            batch.append(json.dumps(_get_map_location(LocationSummary(row))))
+            if len(batch) == EXPORT_BATCH_SIZE:
+                yield separator + ', '.join(batch)
+                separator = ', '
+                batch = []
+        if batch:
+            yield separator + ', '.join(batch)
+        yield ']}'
+
+    return app.response_class(stream_with_context(generate()),
+                              mimetype='application/json')
@@ -6,7 +6,7 @@ from flask_login import current_user
 from flask_babel import _
 
 from app.database import db
-from app.utils.pagination import Pagination
+from app.utils.pagination import Pagination, paginate
 from app.utils import utils
 from app.models.user import User
 from app.models.message import Thread, Message
@@ -56,9 +56,10 @@ def _reply(thread: Thread, message: str) -> None:
 @blueprint.route('/<int:page>')
 def browse(page: int = 1):
     """Browse message threads."""
-    query = Thread.get(current_user).paginate(
-        page, app.config['ITEMS_PER_PAGE'], True)
-    pagination = Pagination(page, query.pages, 'message.browse')
+    query = paginate(Thread.get(current_user), page,
+                     app.config['ITEMS_PER_PAGE'])
+    pagination = Pagination(page, query.pages, 'message.browse',
+                            approximate=query.approximate)
     return render_template('message/browse.html', threads=query.items,
                            pagination=pagination)
 
@@ -1,23 +1,32 @@
 """Routes for uploaded files."""
 import os
-from typing import Tuple
+import mimetypes
+from typing import Tuple, cast
 from uuid import UUID
 from flask import Blueprint, send_from_directory, abort, flash, \
-    render_template, request
+    render_template, request, session, make_response
 from flask import current_app as app
 from flask_login import current_user
 from flask_babel import _
 
+from werkzeug.security import safe_join
+
 from app.database import db
+from app.decorators import public
 from app.utils.utils import redirect_return
 from app.models.location import Location, Category
+from app.models.user import User
 from app.forms.upload import PhotoForm, PhotoEditForm, DocumentForm, \
      DocumentEditForm, BookForm, BookEditForm
-from app.models.upload import Upload, UploadType
+from app.models.upload import Upload, UploadType, is_thumbnail_path, \
+    get_default_thumbnail_path, get_variant_paths
 
 
 blueprint = Blueprint('upload', __name__, url_prefix='/upload')
 
+# not known by older Python versions
+mimetypes.add_type('image/avif', '.avif')
+
 
 def _get_path_and_uuid(object_type: str,
                        object_id: int) -> Tuple[str, UUID]:
@@ -41,15 +50,85 @@ def _get_path_and_uuid(object_type: str,
     return (subfolder, obj.uuid)
 
 
+def _get_variant(base_dir: str, path: str) -> str:
+    """Gets the thumbnail variant in the best format accepted by browser.
+
+    Args:
+        base_dir: Full path to the uploads dir
+        path: Relative path to the thumbnail
+    Returns:
+        Relative path to the variant, the thumbnail itself if the browser
+        doesn't accept any of the formats or the variant doesn't exist
+    """
+    accepted = {mimetype for mimetype, quality in request.accept_mimetypes
+                if quality > 0}
+    for variant in get_variant_paths(path):
+        mimetype = 'image/' + variant.rsplit('.', 1)[1]
+        if mimetype in accepted and \
+                os.path.exists(os.path.join(base_dir, variant)):
+            return variant
+    return path
+
+
 @blueprint.route('/<path:path>')
+@public
 def get(path: str):
     """ Gets uploaded file from local storage.
 
+    The route is called for every image shown, so it avoids any database
+    access. Logged in users are recognized by the session cookie and the
+    cached user record (banned users are rejected).
+
+    The file is sent by the front proxy if UPLOAD_ACCEL_REDIRECT (nginx)
+    or USE_X_SENDFILE is configured. Thumbnails never change, so they are
+    cached by browsers for THUMBNAIL_MAX_AGE, a placeholder is sent instead
+    of thumbnails of images still being processed. The THUMBNAIL_SIZE_PX
+    thumbnail is sent instead of sizes not created yet for older images.
+    The thumbnails are sent in the best of THUMBNAIL_FORMATS listed in the
+    Accept header.
+
     Args:
         path: Path to file, relative to upload directory
     """
+    user_id = session.get('_user_id')
+    if user_id is None or User.get_logged_in(int(user_id)) is None:
+        abort(401)
+
     base_dir = os.path.join(app.instance_path, app.config['UPLOAD_DIR'])
-    return send_from_directory(base_dir, path, conditional=True)
+    full_path = safe_join(base_dir, path)
+    if full_path is None:
+        abort(404)
+    if is_thumbnail_path(path) and not os.path.exists(full_path):
+        # the image is still being processed or the size was added later
+        default = get_default_thumbnail_path(path)
+        default_path = safe_join(base_dir, default)
+        if default != path and default_path is not None and \
+                os.path.exists(default_path):
+            response = send_from_directory(base_dir, default)
+        else:
+            response = send_from_directory(
+                cast(str, app.static_folder), 'images/photo_placeholder.png')
+        response.cache_control.no_cache = True
+        return response
+
+    if is_thumbnail_path(path):
+        path = _get_variant(base_dir, path)
+
+    if app.config['UPLOAD_ACCEL_REDIRECT']:
+        response = make_response('')
+        response.headers['X-Accel-Redirect'] = \
+            app.config['UPLOAD_ACCEL_REDIRECT'].rstrip('/') + '/' + path
+        # the type is set by nginx according to the file
+        del response.headers['Content-Type']
+    else:
+        response = send_from_directory(base_dir, path, conditional=True)
+
+    response.cache_control.private = True
+    if is_thumbnail_path(path):
+        response.cache_control.max_age = app.config['THUMBNAIL_MAX_AGE']
+        response.cache_control.immutable = True
+        response.vary.add('Accept')
+    return response
 
 
 @blueprint.route('/photo/add/<string:object_type>/<int:object_id>',
@@ -2,8 +2,43 @@ window.addEventListener('load', function() {
     /* Apply dselect handling to corresponding class */
     document.querySelectorAll('.dselect').forEach(el => dselect(el))
     baguetteBox.run('.gallery');
+    document.querySelectorAll('input[data-autocomplete]').forEach(el => searchSuggestions(el))
 });
 
+/**
+ * Fill search input suggestions with names returned by server
+ *
+ * @param input     Input element with data-autocomplete url and datalist
+ */
+function searchSuggestions(input) {
+    let request = null;
+
+    input.addEventListener('input', function() {
+        if (request) {
+            request.abort();
+        }
+        const list = input.list;
+        if (input.value.trim() == '') {
+            list.replaceChildren();
+            return;
+        }
+
+        request = new XMLHttpRequest();
+        request.onload = function() {
+            if (this.status != 200) {
+                return;
+            }
+            list.replaceChildren(...JSON.parse(this.responseText).map(item => {
+                const option = document.createElement('option');
+                option.value = item.name;
+                return option;
+            }));
+        };
+        request.open('GET', input.dataset.autocomplete + '?q=' + encodeURIComponent(input.value));
+        request.send();
+    });
+}
+
 /**
  * Show android like toast
  *
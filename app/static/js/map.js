@@ -180,20 +180,65 @@ class MyMap {
     }
 
     /**
-     * Fetches data from JSON endpoint
+     * Fetches locations from JSON endpoint
+     *
+     * Only locations around the visible part of the map are fetched, the
+     * data are reloaded once the map is moved out of the loaded area.
      *
      * @param {str} url    URL of the endpoint to fetch data from
      */
     fetchLocations(url) {
+        this.locationsUrl = url
+        this.loadedBounds = null
+        this.filters = []
+        this.serverClusters = L.layerGroup().addTo(this.map)
+        this.map.on('moveend', () => {
+            if (!this.loadedBounds || !this.loadedBounds.contains(this.map.getBounds())
+                    || this.loadedZoom != this.map.getZoom()) {
+                this.loadLocations()
+            }
+        })
+        this.loadLocations()
+    }
+
+    /**
+     * Loads locations around the current map viewport
+     */
+    loadLocations() {
+        if (this.locationsRequest) {
+            this.locationsRequest.abort()
+        }
         const request = new XMLHttpRequest();
         const markers = this.markers
         const map = this.map
+        const bounds = map.getBounds().pad(0.5)
+        const zoom = map.getZoom()
+        const url = new URL(this.locationsUrl, window.location.href)
+        url.searchParams.set('bbox', bounds.toBBoxString())
+        url.searchParams.set('zoom', zoom)
+        this.locationsRequest = request
 
-        request.onload = function() {
+        request.onload = () => {
             const types = new Set()
             const states = new Set()
             const accessibility = new Set()
-            const data = JSON.parse(this.responseText);
+            const data = JSON.parse(request.responseText);
+
+            this.locationsRequest = null
+            this.loadedBounds = bounds
+            this.loadedZoom = zoom
+            markers.clearLayers()
+            this.serverClusters.clearLayers()
+
+            /* Server clustered the locations for low zoom levels */
+            if (data.clusters) {
+                this.filters.forEach(filter => filter.remove())
+                this.filters = []
+                data.clusters.forEach(cluster => {
+                    this.serverClusters.addLayer(this.clusterMarker(cluster))
+                })
+                return
+            }
 
             data.locations.forEach(location => {
                 let marker = L.marker([location.latitude, location.longitude], {
@@ -206,7 +251,7 @@ class MyMap {
 
                 marker.bindPopup(`
                     <div style="min-width: 200px">
-                        <img src="${location.image}" style="width: 100%">
+                        <img src="${location.image}" srcset="${location.srcset}" sizes="300px" style="width: 100%">
                         <h4 class="mt-2">
                             <a href="/location/${location.id}">${location.name}</a>
                         </h4>
@@ -221,6 +266,7 @@ class MyMap {
             })
 
             /* Add filter buttons with types/states received */
+            this.filters.forEach(filter => filter.remove())
             const clearText = "Reset"
             const typeFilter = L.control.tagFilterButton({
                 data: [...types],
@@ -240,12 +286,11 @@ class MyMap {
                 filterOnEveryClick: true,
                 clearText: clearText
             });
-            typeFilter.addTo(map)
-            typeFilter.enableMCG(markers)
-            stateFilter.addTo(map)
-            stateFilter.enableMCG(markers)
-            accessibilityFilter.addTo(map)
-            accessibilityFilter.enableMCG(markers)
+            this.filters = [typeFilter, stateFilter, accessibilityFilter]
+            this.filters.forEach(filter => {
+                filter.addTo(map)
+                filter.enableMCG(markers)
+            })
 
             /* Close filter for when other button is clicked */
             const elements = Array.from(document.getElementsByClassName("easy-button-button"))
@@ -266,6 +311,32 @@ class MyMap {
         request.send();
     }
 
+    /**
+     * Creates marker for cluster of locations, zooms in when clicked
+     *
+     * @param {object} cluster  Cluster received from the locations endpoint
+     */
+    clusterMarker(cluster) {
+        let size = 'small'
+        if (cluster.count >= 100) {
+            size = 'large'
+        } else if (cluster.count >= 10) {
+            size = 'medium'
+        }
+
+        const marker = L.marker([cluster.latitude, cluster.longitude], {
+            icon: L.divIcon({
+                html: `<div><span>${cluster.count}</span></div>`,
+                className: `marker-cluster marker-cluster-${size}`,
+                iconSize: L.point(40, 40)
+            })
+        })
+        marker.on('click', () => {
+            this.map.setView(marker.getLatLng(), this.map.getZoom() + 2)
+        })
+        return marker
+    }
+
     /**
      * Fetches list of geofond photos from JSON endpoint
      *
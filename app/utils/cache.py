@@ -0,0 +1,104 @@
+"""In-memory caching utilities."""
+import threading
+from time import monotonic
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class Cache:
+    """Thread safe in-memory cache with optional expiration of items.
+
+    Each process (e.g. gunicorn worker) keeps its own copy of the data, the
+    ttl limits for how long the changes made by other processes may go
+    unnoticed.
+
+    Attributes:
+        ttl: Amount of seconds the item is valid for, None for no expiration
+        max_size: Max amount of items kept, the oldest ones are removed first
+    """
+
+    def __init__(self, ttl: Optional[float] = None,
+                 max_size: Optional[int] = None) -> None:
+        """Initializes the cache.
+
+        Args:
+            ttl: Amount of seconds the item is valid for
+            max_size: Max amount of items to keep, None for unlimited
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Gets cached item.
+
+        Args:
+            key: Key of the item
+            default: Value to return if the item is not cached or expired
+        """
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return default
+            if self.ttl is not None and monotonic() - item[0] > self.ttl:
+                del self._items[key]
+                return default
+            return item[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Stores item to cache.
+
+        Args:
+            key: Key of the item
+            value: Value to be cached
+        """
+        with self._lock:
+            self._items.pop(key, None)
+            if self.max_size is not None and \
+                    len(self._items) >= self.max_size:
+                del self._items[next(iter(self._items))]
+            self._items[key] = (monotonic(), value)
+
+    def get_or_set(self, key: Hashable, creator: Callable[[], Any]) -> Any:
+        """Gets cached item, creates and stores it if not cached yet.
+
+        The lock is not held while the creator runs, concurrent calls
+        may create the value multiple times.
+
+        Args:
+            key: Key of the item
+            creator: Function returning the value to be cached
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = creator()
+            self.set(key, value)
+        return value
+
+    def delete(self, key: Hashable) -> None:
+        """Removes item from cache (if cached).
+
+        Args:
+            key: Key of the item
+        """
+        with self._lock:
+            self._items.pop(key, None)
+
+    def delete_matching(self,
+                        condition: Callable[[Hashable, Any], bool]) -> None:
+        """Removes items matching the condition.
+
+        Args:
+            condition: Function called with key and value of each item,
+                the item is removed if it returns True
+        """
+        with self._lock:
+            for key in [key for key, item in self._items.items()
+                        if condition(key, item[1])]:
+                del self._items[key]
+
+    def clear(self) -> None:
+        """Removes all items from cache."""
+        with self._lock:
+            self._items.clear()
@@ -1,8 +1,10 @@
 """Geolocation utilities."""
 import re
+import math
 import urllib.request
 import logging
 import json
+from typing import Dict, List, Optional, Tuple
 from urllib.error import URLError
 
 
@@ -122,3 +124,186 @@ class LatLon:
         seconds = (value - degrees - minutes/60)*3600
 
         return f'{degrees}°{minutes}\'{seconds:.1f}" {direction}'
+
+
+class BoundingBox:
+    """Rectangular geographic area, e.g. the part of the map being viewed.
+
+    The area may cross the antimeridian, in such case the western edge has
+    greater longitude than the eastern one.
+
+    Attributes:
+        west: Longitude of the western edge
+        south: Latitude of the southern edge
+        east: Longitude of the eastern edge
+        north: Latitude of the northern edge
+    """
+
+    def __init__(self, west: float, south: float, east: float,
+                 north: float) -> None:
+        """Initializes a BoundingBox object.
+
+        Longitudes out of the -180 to 180 range (e.g. from the map wrapped
+        around the world) are normalized, latitudes are clamped to poles.
+
+        Args:
+            west: Longitude of the western edge in decimal degrees
+            south: Latitude of the southern edge in decimal degrees
+            east: Longitude of the eastern edge in decimal degrees
+            north: Latitude of the northern edge in decimal degrees
+        Raises:
+            ValueError: When the edges doesn't form a valid area
+        """
+        if south > north or west > east:
+            raise ValueError("Bounding box edges are swapped")
+
+        if east - west >= 360:
+            west, east = -180, 180
+        else:
+            west = self._wrap_longitude(west)
+            east = self._wrap_longitude(east)
+
+        self.west = LatLon(west, is_latitude=False)
+        self.south = LatLon(max(south, -90), is_latitude=True)
+        self.east = LatLon(east, is_latitude=False)
+        self.north = LatLon(min(north, 90), is_latitude=True)
+
+    @classmethod
+    def from_str(cls, data: str):
+        """Converts the bounding box string to object
+
+        Args:
+            data: Comma separated decimal degrees in west,south,east,north
+                order (as generated by leaflet's toBBoxString)
+        Raises:
+            ValueError: When string doesn't contain valid data
+        """
+        values = data.split(',')
+        if len(values) != 4:
+            raise ValueError(f"Invalid bounding box format: {data}")
+        west, south, east, north = map(float, values)
+        if not all(map(math.isfinite, (west, south, east, north))):
+            raise ValueError(f"Invalid bounding box value: {data}")
+        return cls(west, south, east, north)
+
+    @property
+    def crosses_antimeridian(self) -> bool:
+        """Checks if the area spans over the 180th meridian."""
+        return self.west.value > self.east.value
+
+    def contains(self, latitude: float, longitude: float) -> bool:
+        """Checks if the point lies in this area.
+
+        Args:
+            latitude: Latitude of the point in decimal degrees
+            longitude: Longitude of the point in decimal degrees
+        """
+        if not self.south.value <= latitude <= self.north.value:
+            return False
+        if self.crosses_antimeridian:
+            return longitude >= self.west.value or \
+                longitude <= self.east.value
+        return self.west.value <= longitude <= self.east.value
+
+    @staticmethod
+    def _wrap_longitude(value: float) -> float:
+        """Converts longitude to -180 to 180 degrees range."""
+        if -180 <= value <= 180:
+            return value
+        return (value + 180) % 360 - 180
+
+
+class Cluster:
+    """Group of nearby points.
+
+    Attributes:
+        count: Amount of points in the cluster
+        latitude: Latitude of the cluster centroid in decimal degrees
+        longitude: Longitude of the cluster centroid in decimal degrees
+    """
+    __slots__ = ('count', '_latitude_sum', '_longitude_sum')
+
+    def __init__(self) -> None:
+        """Initializes an empty cluster."""
+        self.count = 0
+        self._latitude_sum = 0.0
+        self._longitude_sum = 0.0
+
+    def add(self, latitude: float, longitude: float) -> None:
+        """Adds point to the cluster.
+
+        Args:
+            latitude: Latitude of the point in decimal degrees
+            longitude: Longitude of the point in decimal degrees
+        """
+        self.count += 1
+        self._latitude_sum += latitude
+        self._longitude_sum += longitude
+
+    @property
+    def latitude(self) -> float:
+        """Latitude of the cluster centroid."""
+        return self._latitude_sum / self.count
+
+    @property
+    def longitude(self) -> float:
+        """Longitude of the cluster centroid."""
+        return self._longitude_sum / self.count
+
+
+class ClusterGrid:
+    """Groups points to clusters by grid cells sized by the map zoom level.
+
+    The cell size corresponds to a fraction of the map tile at given zoom
+    level, so the amount of clusters shown on screen is bounded no matter
+    how many points are clustered.
+    """
+
+    def __init__(self, zoom: int, cells_per_tile: int = 4) -> None:
+        """Initializes an empty grid.
+
+        Args:
+            zoom: Map zoom level (0 for whole world in a single tile)
+            cells_per_tile: Amount of cells along each side of map tile
+        """
+        self.zoom = zoom
+        self.cells_per_tile = cells_per_tile
+        self.cell_size = 360 / 2**zoom / cells_per_tile
+        self.cells: Dict[Tuple[int, int], Cluster] = {}
+
+    def add(self, latitude: float, longitude: float) -> None:
+        """Adds point to the cluster of corresponding cell.
+
+        Args:
+            latitude: Latitude of the point in decimal degrees
+            longitude: Longitude of the point in decimal degrees
+        """
+        key = (int((latitude + 90) // self.cell_size),
+               int((longitude + 180) // self.cell_size))
+        cluster = self.cells.get(key)
+        if cluster is None:
+            cluster = self.cells[key] = Cluster()
+        cluster.add(latitude, longitude)
+
+    def copy(self):
+        """Creates an independent copy of the grid."""
+        grid = ClusterGrid(self.zoom, self.cells_per_tile)
+        for key, cluster in self.cells.items():
+            grid.cells[key] = copy = Cluster()
+            copy.count = cluster.count
+            # pylint: disable=protected-access
+            copy._latitude_sum = cluster._latitude_sum
+            copy._longitude_sum = cluster._longitude_sum
+        return grid
+
+    def get_clusters(self, area: Optional[BoundingBox] = None
+                     ) -> List[Cluster]:
+        """Gets clusters, optionally only those centered in given area.
+
+        Args:
+            area: Area to get clusters from, all clusters if None
+        """
+        if area is None:
+            return list(self.cells.values())
+        return [c for c in self.cells.values()
+                if area.contains(c.latitude, c.longitude)]
@@ -1,6 +1,9 @@
 """Image helpers."""
 import os
-from typing import Union
+import shutil
+import tempfile
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 from PIL import Image
 from werkzeug.datastructures import FileStorage
 
@@ -15,7 +18,9 @@ class Img:
         """
         self.image = Image.open(file)
 
-    def thumbnail(self, dest: str, max_size: int) -> None:
+    def thumbnail(self, dest: str, max_size: int,
+                  variants: Iterable[str] = (),
+                  max_height: Optional[int] = None) -> None:
         """Makes thumbnail from image.
 
         This alerts size of the internal loaded image too!
@@ -23,13 +28,41 @@ class Img:
         Args:
             destination: Destination path to store result to
             max_size: Max size in either dimension of the image
+            variants: Paths to store the result in other formats to, the
+                format is given by the extension (e.g. photo.jpg.webp)
+            max_height: Max height of the image if other than max_size
         """
-        self.image.thumbnail((max_size, max_size))
+        self.image.thumbnail((max_size, max_height or max_size))
         self._mkdir(dest)
         params = {}
         if 'exif' in self.image.info:
             params['exif'] = self.image.info['exif']
         self.image.save(dest, **params)
+        for variant in variants:
+            self.image.save(variant, **params)
+
+    def derivatives(self, sizes: Dict[str, Tuple[int, int]],
+                    variants: Optional[Dict[str, List[str]]] = None) -> None:
+        """Stores the image in several sizes, decoding it only once.
+
+        JPEG images are decoded directly at the lowest scale still larger
+        than the biggest result (draft mode), each smaller size is then made
+        from the previous one. The internal loaded image is altered too!
+
+        Args:
+            sizes: Destination path to max width and height mapping
+            variants: Destination path to paths of its variants in other
+                formats mapping
+        """
+        variants = variants or {}
+        width, height = self.image.size
+        scale = min(1, max(min(box_width / width, box_height / height)
+                           for box_width, box_height in sizes.values()))
+        self.image.draft(None, (round(width * scale), round(height * scale)))
+        for dest, (max_width, max_height) in sorted(
+                sizes.items(), key=lambda item: item[1], reverse=True):
+            self.thumbnail(dest, max_width, variants.get(dest, ()),
+                           max_height)
 
     def _mkdir(self, path: str) -> None:
         """Creates target directory if doesn't exist yet.
@@ -40,3 +73,48 @@ class Img:
         dest_dir = os.path.dirname(path)
         if not os.path.exists(dest_dir):
             os.makedirs(dest_dir)
+
+
+@lru_cache()
+def get_supported_formats(formats: Tuple[str, ...]) -> List[str]:
+    """Filters image formats Pillow can save in this installation.
+
+    Args:
+        formats: Image format extensions (e.g. webp, avif)
+    """
+    Image.init()
+    return [fmt for fmt in formats if fmt.upper() in Image.SAVE]
+
+
+def process_image(path: str, sizes: Dict[str, Tuple[int, int]],
+                  variants: Optional[Dict[str, List[str]]] = None) -> None:
+    """Stores the image in several sizes.
+
+    Runs in the image processing worker processes, so it works with paths
+    only. The reduced image is stored to a temporary file first and moved
+    over the original at the end, so the original is never left partially
+    written.
+
+    Args:
+        path: Full path to the image
+        sizes: Full destination path to max width and height mapping, the
+            image itself may be overwritten by reduced one
+        variants: Full destination path to full paths of its variants in
+            other formats mapping
+    """
+    sizes = dict(sizes)
+    temp_path = None
+    if path in sizes:
+        fd, temp_path = tempfile.mkstemp(suffix=os.path.splitext(path)[1],
+                                         dir=os.path.dirname(path))
+        os.close(fd)
+        shutil.copymode(path, temp_path)
+        sizes[temp_path] = sizes.pop(path)
+
+    try:
+        Img(path).derivatives(sizes, variants)
+        if temp_path is not None:
+            os.replace(temp_path, path)
+    finally:
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
@@ -1,6 +1,15 @@
 """Pagination utility."""
-from typing import Tuple
-from flask import url_for
+import json
+import math
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from flask import url_for, abort
+from sqlalchemy import Column, DateTime, and_, or_
+from sqlalchemy.orm import Query
+
+from app.database import count
 
 
 class Pagination:
@@ -8,17 +17,20 @@ class Pagination:
 
     Attributes:
         current: Current page number
+        count: Amount of pages
+        approximate: True if the amount of pages is just an estimate
         next: Link to next page or None
         prev: Link to prev page or None
         pages: Dict of page_num: link
         show: Show pagination (more than 1 page)
+        total: Amount of results if shown instead of pages, None if unknown
     """
     # how many page numbers to show
     nav_len = 8
     # how many number show immediately before/after current page
     window_len = 2
 
-    def __init__(self, current, pages, *args, **kwargs):
+    def __init__(self, current, pages, *args, approximate=False, **kwargs):
         """Initializes pagination object
 
         Call e.g. like Pagination(1, 10, 'some.route', route_arg1=foo).
@@ -26,13 +38,17 @@ class Pagination:
         Args:
             current: Current page number (starts from 1)
             pages: Amount of pages available
+            approximate: True if the amount of pages is just an estimate
             Rest of the arguments is passed to url_for generator
         """
         self.current = current
+        self.count = pages
+        self.approximate = approximate
         self.prev = None
         self.next = None
         self.pages = {}
         self.show = True
+        self.total: Optional[int] = None
 
         if pages <= 1:
             self.show = False
@@ -89,3 +105,231 @@ class Pagination:
             if win_from < 1:  # pylint: disable=consider-using-max-builtin
                 win_from = 1
         return win_from, win_to
+
+
+class Page:
+    """Page of results loaded by offset pagination.
+
+    Attributes:
+        items: Results on the page
+        page: Page number (starts from 1)
+        pages: Amount of pages
+        approximate: True if the amount of pages is just an estimate
+    """
+
+    def __init__(self, items: List[Any], page: int, pages: int,
+                 approximate: bool):
+        """Initializes the page.
+
+        Args:
+            items: Results on the page
+            page: Page number
+            pages: Amount of pages
+            approximate: True if the amount of pages is just an estimate
+        """
+        self.items = items
+        self.page = page
+        self.pages = pages
+        self.approximate = approximate
+
+
+class KeysetPage:
+    """Page of results loaded by keyset pagination.
+
+    Attributes:
+        items: Results on the page
+        prev: Cursor of the previous page, None if this is the first one
+        next: Cursor of the next page, None if this is the last one
+    """
+
+    def __init__(self, items: List[Any], prev: Optional[str],
+                 next_cursor: Optional[str]):
+        """Initializes the page.
+
+        Args:
+            items: Results on the page
+            prev: Cursor of the previous page
+            next_cursor: Cursor of the next page
+        """
+        self.items = items
+        self.prev = prev
+        self.next = next_cursor
+
+
+class KeysetPagination(Pagination):
+    """Navigation of pages loaded by keyset pagination.
+
+    There are no page numbers, only links to previous and next pages and
+    optionally the total amount of results.
+    """
+
+    def __init__(self, page: KeysetPage, *args,
+                 total: Optional[Tuple[int, bool]] = None, **kwargs):
+        """Initializes pagination object
+
+        Call e.g. like KeysetPagination(page, 'some.route', route_arg1=foo).
+
+        Args:
+            page: Current page of results
+            total: Amount of results and True if it's approximate (e.g.
+                from app.database.count), None to not show it
+            Rest of the arguments is passed to url_for generator
+        """
+        super().__init__(1, 1)
+        self.show = page.prev is not None or page.next is not None
+        if total is not None:
+            self.total, self.approximate = total
+        if page.prev is not None:
+            self.prev = url_for(*args, **kwargs, cursor=page.prev)
+        if page.next is not None:
+            self.next = url_for(*args, **kwargs, cursor=page.next)
+
+
+def paginate(query: Query, page: int, per_page: int,
+             count_query: Optional[Query] = None) -> Page:
+    """Loads a page of results.
+
+    The total amount of results is cached (see app.database.count), large
+    amounts are only approximate. The amount of pages is corrected when
+    the first or the last page is reached.
+
+    Args:
+        query: SQL query to paginate
+        page: Page number (starts from 1), aborts with 404 if out of range
+        per_page: Max amount of results on the page
+        count_query: Query to count the results by if cheaper than query
+    Returns:
+        Page of results
+    """
+    if page < 1:
+        abort(404)
+    items = query.limit(per_page + 1).offset((page - 1) * per_page).all()
+    if not items and page != 1:
+        abort(404)
+
+    if len(items) <= per_page:
+        return Page(items, page, page, False)
+
+    total, approximate = count(query if count_query is None else count_query)
+    pages = max(math.ceil(total / per_page), page + 1)
+    return Page(items[:per_page], page, pages, approximate)
+
+
+def _dump_value(value: Any) -> Any:
+    """Converts column value to json serializable one."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _load_value(column: Column, value: Any) -> Any:
+    """Converts json value back to column value."""
+    if value is not None and isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def keyset_paginate(query: Query, columns: Sequence[Column], per_page: int,
+                    cursor: Optional[str] = None) -> KeysetPage:
+    """Loads a page of results, newest first, without OFFSET and COUNT.
+
+    The results are ordered by the columns in descending order, the
+    columns must be unique together (e.g. end with primary key), not null
+    and selected by the query under their names. The page is found by
+    comparing the columns with values of the last seen row, so it can be
+    served by an index on the columns.
+
+    Args:
+        query: SQL query to paginate, its ordering is replaced
+        columns: Columns to order the results by
+        per_page: Max amount of results on the page
+        cursor: Cursor of the page to load, None for the first page
+    Returns:
+        Page of results
+    Raises:
+        ValueError: Invalid cursor
+    """
+    forward = True
+    if cursor is not None:
+        values = decode_cursor(cursor)
+        if len(values) != len(columns) + 1 or values[0] not in ('n', 'p'):
+            raise ValueError(f'Invalid cursor: {cursor}')
+        forward = values[0] == 'n'
+        try:
+            key = [_load_value(column, value)
+                   for column, value in zip(columns, values[1:])]
+        except (TypeError, ValueError) as ex:
+            raise ValueError(f'Invalid cursor: {cursor}') from ex
+        query = query.filter(_after(columns, key, forward))
+
+    if forward:
+        query = query.order_by(None).order_by(*[c.desc() for c in columns])
+    else:
+        query = query.order_by(None).order_by(*[c.asc() for c in columns])
+    items = query.limit(per_page + 1).all()
+    more = len(items) > per_page
+    items = items[:per_page]
+    if not forward:
+        items.reverse()
+    if not items:
+        return KeysetPage(items, None, None)
+
+    def get_cursor(direction: str, row: Any) -> str:
+        return encode_cursor(direction, *[
+            _dump_value(getattr(row, column.key)) for column in columns])
+
+    prev_cursor = None
+    next_cursor = None
+    if (forward and cursor is not None) or (not forward and more):
+        prev_cursor = get_cursor('p', items[0])
+    if (forward and more) or not forward:
+        next_cursor = get_cursor('n', items[-1])
+    return KeysetPage(items, prev_cursor, next_cursor)
+
+
+def _after(columns: Sequence[Column], key: Sequence[Any], forward: bool):
+    """Builds condition for rows following the key in given direction.
+
+    For columns (a, b) and forward direction it's
+    a < key_a OR (a == key_a AND b < key_b).
+    """
+    conditions = []
+    for i, column in enumerate(columns):
+        equal = [columns[j] == key[j] for j in range(i)]
+        if forward:
+            conditions.append(and_(*equal, column < key[i]))
+        else:
+            conditions.append(and_(*equal, column > key[i]))
+    return or_(*conditions)
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encodes position in results to an opaque string.
+
+    Args:
+        values: JSON serializable values describing the position
+    Returns:
+        URL safe cursor string
+    """
+    data = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Decodes cursor created by encode_cursor.
+
+    Args:
+        cursor: Cursor string
+    Returns:
+        List of the values describing the position
+    Raises:
+        ValueError: Invalid cursor
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(data)
+    except (binascii.Error, UnicodeDecodeError) as ex:
+        raise ValueError(f'Invalid cursor: {cursor}') from ex
+    if not isinstance(values, list):
+        raise ValueError(f'Invalid cursor: {cursor}')
+    return values
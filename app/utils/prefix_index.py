@@ -0,0 +1,118 @@
+"""In-memory index for prefix lookups (e.g. autocomplete)."""
+import bisect
+import threading
+import unicodedata
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, \
+    Tuple
+
+
+def fold(string: str) -> str:
+    """Normalizes string for comparison.
+
+    Diacritics are removed and the string is case folded, e.g. 'Důl' and
+    'dul' are the same after folding.
+
+    Args:
+        string: String to be normalized
+    Returns:
+        Normalized string
+    """
+    decomposed = unicodedata.normalize('NFKD', string)
+    return ''.join(char for char in decomposed
+                   if not unicodedata.combining(char)).casefold()
+
+
+class PrefixIndex:
+    """Thread safe index of strings searchable by prefixes of their words.
+
+    The index is kept as a sorted array, lookups and updates are done by
+    binary search. Every word of the string is indexed together with the
+    rest of the string, e.g. 'Důl Jeroným' is found by 'dul', 'dul jer'
+    or 'jeronym'.
+
+    Items must be hashable and comparable with each other (e.g. tuples).
+    """
+
+    def __init__(self,
+                 items: Iterable[Tuple[Hashable, str]] = ()) -> None:
+        """Initializes the index.
+
+        Args:
+            items: Initial (item, string) pairs to be indexed
+        """
+        self._keys: List[Tuple[str, Hashable]] = []
+        self._items: Dict[Hashable, List[str]] = {}
+        self._lock = threading.Lock()
+
+        for item, string in items:
+            self._items[item] = self._get_keys(string)
+        self._keys = sorted((key, item) for item, keys in self._items.items()
+                            for key in keys)
+
+    def __len__(self) -> int:
+        """Gets amount of items in index."""
+        return len(self._items)
+
+    @staticmethod
+    def _get_keys(string: str) -> List[str]:
+        """Gets keys to index the string by."""
+        words = fold(string).split()
+        return sorted({' '.join(words[i:]) for i in range(len(words))})
+
+    def add(self, item: Hashable, string: str) -> None:
+        """Adds item to index, replaces the item if already indexed.
+
+        Args:
+            item: Item to be returned by lookups
+            string: String the item is found by
+        """
+        keys = self._get_keys(string)
+        with self._lock:
+            self._remove(item)
+            for key in keys:
+                bisect.insort(self._keys, (key, item))
+            self._items[item] = keys
+
+    def remove(self, item: Hashable) -> None:
+        """Removes item from index (if indexed).
+
+        Args:
+            item: Item to be removed
+        """
+        with self._lock:
+            self._remove(item)
+
+    def _remove(self, item: Hashable) -> None:
+        """Removes item from index, the lock must be held by caller."""
+        for key in self._items.pop(item, []):
+            index = bisect.bisect_left(self._keys, (key, item))
+            del self._keys[index]
+
+    def find(self, prefix: str, limit: Optional[int] = None,
+             condition: Optional[Callable[[Hashable], bool]] = None
+             ) -> List[Hashable]:
+        """Finds items with a word starting with the prefix.
+
+        Args:
+            prefix: Prefix to look for, diacritics and case are ignored
+            limit: Max amount of items to return, None for unlimited
+            condition: Function returning False for items to be skipped
+        Returns:
+            List of unique items, ordered by the matching words
+        """
+        prefix = ' '.join(fold(prefix).split())
+        found: List[Hashable] = []
+        seen = set()
+        with self._lock:
+            index = bisect.bisect_left(self._keys, (prefix,))
+            while index < len(self._keys) and \
+                    (limit is None or len(found) < limit):
+                key, item = self._keys[index]
+                if not key.startswith(prefix):
+                    break
+                if item not in seen:
+                    seen.add(item)
+                    if condition is None or condition(item):
+                        found.append(item)
+                index += 1
+        return found
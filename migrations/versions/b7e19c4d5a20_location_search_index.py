@@ -0,0 +1,67 @@
+"""Location full-text search index
+
+Revision ID: b7e19c4d5a20
+Revises: 8c4d2f7a1e36
+Create Date: 2026-10-17 15:02:37.918364
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e19c4d5a20'
+down_revision = '8c4d2f7a1e36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("""
+            CREATE VIRTUAL TABLE location_search USING fts5(
+                name, description, about, categories,
+                tokenize='unicode61 remove_diacritics 2'
+            )""")
+        op.execute("""
+            INSERT INTO location_search(rowid, name, description, about,
+                                        categories)
+            SELECT location.id, location.name,
+                coalesce(location.description, ''),
+                coalesce(location.about, ''), coalesce((
+                    SELECT group_concat(category.name, ' ') FROM category
+                    JOIN category_association
+                        ON category.id = category_association.category_id
+                    WHERE category_association.location_id = location.id
+                ), '')
+            FROM location""")
+    elif dialect == 'mysql':
+        op.execute("""
+            CREATE TABLE location_search (
+                location_id INTEGER NOT NULL PRIMARY KEY,
+                name VARCHAR(32) NOT NULL,
+                description VARCHAR(2048) NOT NULL,
+                about TEXT NOT NULL,
+                categories TEXT NOT NULL,
+                FULLTEXT INDEX ix_location_search (name, description, about,
+                                                   categories)
+            ) ENGINE=InnoDB""")
+        op.execute("""
+            INSERT INTO location_search(location_id, name, description, about,
+                                        categories)
+            SELECT location.id, location.name,
+                coalesce(location.description, ''),
+                coalesce(location.about, ''), coalesce((
+                    SELECT group_concat(category.name SEPARATOR ' ')
+                    FROM category
+                    JOIN category_association
+                        ON category.id = category_association.category_id
+                    WHERE category_association.location_id = location.id
+                ), '')
+            FROM location""")
+
+
+def downgrade():
+    if op.get_bind().dialect.name in ('sqlite', 'mysql'):
+        op.drop_table('location_search')
@@ -6,3 +6,9 @@ class TestConfig(Config):
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     SQLALCHEMY_ECHO = False
     WTF_CSRF_ENABLED = False
+    # store last seen times on each request
+    LAST_SEEN_INTERVAL = 0
+    # store event log records in the transaction of the request
+    EVENT_LOG_INTERVAL = None
+    # process uploaded images in the request
+    IMAGE_WORKERS = 0
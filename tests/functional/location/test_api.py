@@ -0,0 +1,231 @@
+"""Functional tests for the locations JSON API."""
+import json
+import time
+from sqlalchemy import update
+import tests.helpers as helpers
+from app.models.location import Location
+from app.models.version import DataVersion, VERSIONS_TTL
+
+
+def _get_names(response):
+    return {loc['name'] for loc in json.loads(response.data)['locations']}
+
+
+def _get_counts(response):
+    clusters = json.loads(response.data)['clusters']
+    return sorted(cluster['count'] for cluster in clusters)
+
+
+def test_api_all(client, login_root):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the locations are requested without bounding box
+    THEN all visible locations are returned
+    """
+    helpers.add_location('Prague', 50.08, 14.43)
+    helpers.add_location('Brno', 49.19, 16.60)
+    helpers.add_location('Private', 49.19, 16.60, published=False,
+                         owner_id=1)
+
+    response = client.get('/location/api')
+    assert response.status_code == 200
+    names = _get_names(response)
+    assert {'Prague', 'Brno'} <= names
+    assert 'Private' not in names
+
+
+def test_api_details(client, login_root):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the locations are requested
+    THEN the location details are returned
+    """
+    helpers.add_location('Jihlava', 49.40, 15.59, photo=True)
+
+    response = client.get('/location/api?bbox=15.5,49.3,15.7,49.5')
+    locations = json.loads(response.data)['locations']
+    assert len(locations) == 1
+    location = locations[0]
+    assert location['name'] == 'Jihlava'
+    assert location['description'] == 'Jihlava description'
+    assert abs(location['latitude'] - 49.40) < 1e-6
+    assert abs(location['longitude'] - 15.59) < 1e-6
+    assert location['image'].endswith('location/thumbnail/256/Jihlava.jpg')
+    assert 'location/thumbnail/Jihlava.jpg 512w' in location['srcset']
+    assert location['type'] == 'Mine'
+    assert location['state'] == 'Unknown'
+    assert location['accessibility'] == 'Inaccessible'
+
+
+def test_api_bbox(client, login_root):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the locations are requested for a bounding box
+    THEN only locations in the given area are returned
+    """
+    helpers.add_location('Ostrava', 49.83, 18.28)
+    helpers.add_location('Opava', 49.94, 17.90)
+    helpers.add_location('Fiji', -17.71, 178.06)
+    helpers.add_location('Samoa', -13.75, -172.10)
+
+    response = client.get('/location/api?bbox=18,49.5,19,50')
+    assert _get_names(response) == {'Ostrava'}
+
+    response = client.get('/location/api/underground?bbox=17.5,49.5,19,50')
+    assert _get_names(response) == {'Ostrava', 'Opava'}
+
+    response = client.get('/location/api?bbox=170,-20,190,-10')
+    assert _get_names(response) == {'Fiji', 'Samoa'}
+
+    response = client.get('/location/api?bbox=-500,-90,500,90')
+    assert {'Ostrava', 'Opava', 'Fiji', 'Samoa'} <= _get_names(response)
+
+
+def test_api_cache(client, login_root):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the locations are changed between requests
+    THEN the changes are returned
+    """
+    bbox = '-60,60,-50,70'
+    location = helpers.add_location('Nuuk', 64.18, -51.72)
+    assert _get_names(client.get(f'/location/api?bbox={bbox}')) == {'Nuuk'}
+
+    helpers.add_location('Qaqortoq', 60.72, -55.83)
+    helpers.add_location('Own', 65.6, -53.0, published=False)
+    helpers.add_location('Foreign', 65.6, -53.0, published=False,
+                         owner_id=1)
+    response = client.get(f'/location/api?bbox={bbox}')
+    assert _get_names(response) == {'Nuuk', 'Qaqortoq', 'Own'}
+
+    location.name = 'Godthab'
+    helpers.db.session.commit()
+    response = client.get(f'/location/api?bbox={bbox}')
+    assert _get_names(response) == {'Godthab', 'Qaqortoq', 'Own'}
+
+
+def test_api_cache_versioned(client, login_root):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the locations are changed by other process
+    THEN the changes are returned once the data version is reloaded
+    """
+    bbox = '-70,60,-60,70'
+    location = helpers.add_location('Iqaluit', 63.75, -68.52)
+    assert _get_names(client.get(f'/location/api?bbox={bbox}')) == \
+        {'Iqaluit'}
+
+    # change made by other process, the local cache is not cleared
+    helpers.db.session.execute(
+        update(Location).where(Location.id == location.id).values(
+            name='Frobisher Bay'))
+    DataVersion.increase(helpers.db.session.connection(), ['map'])
+    helpers.db.session.commit()
+
+    time.sleep(VERSIONS_TTL)
+    assert _get_names(client.get(f'/location/api?bbox={bbox}')) == \
+        {'Frobisher Bay'}
+
+
+def test_api_conditional(client, login_root):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the locations are requested again with the received ETag
+    THEN 304 is returned until the locations change
+    """
+    url = '/location/api?bbox=20,60,30,70'
+    helpers.add_location('Oulu', 65.01, 25.47)
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert 'Last-Modified' not in response.headers
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    response = client.get(url, headers={
+        'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+    assert response.status_code == 200
+
+    response = client.get('/location/api?bbox=20,60,31,70',
+                          headers={'If-None-Match': etag})
+    assert response.status_code == 200
+
+    helpers.add_location('Kemi', 65.74, 24.56)
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert _get_names(response) == {'Oulu', 'Kemi'}
+
+
+def test_api_bbox_invalid(client, login_root):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the locations are requested with invalid bounding box
+    THEN bad request error is returned
+    """
+    for bbox in ('foo', '1,2,3', '15,51,14,49', '1,2,3,nan'):
+        response = client.get(f'/location/api?bbox={bbox}')
+        assert response.status_code == 400
+
+
+def test_api_clusters(client, login_root):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the locations are requested for low zoom level
+    THEN clusters of visible locations are returned and updated on change
+    """
+    bbox = '-80,-40,-60,-20'
+    helpers.add_location('Santiago', -33.45, -70.66)
+    helpers.add_location('Santiago2', -33.46, -70.67)
+    helpers.add_location('Mendoza', -32.89, -68.84)
+    helpers.add_location('Private', -32.89, -68.84, published=False,
+                         owner_id=1)
+
+    response = client.get(f'/location/api?zoom=6&bbox={bbox}')
+    assert _get_counts(response) == [1, 2]
+
+    response = client.get('/location/api?zoom=6&bbox=-72,-34,-70,-33')
+    assert _get_counts(response) == [2]
+
+    helpers.add_location('Mine', -32.89, -68.85, published=False)
+    response = client.get(f'/location/api?zoom=6&bbox={bbox}')
+    assert _get_counts(response) == [2, 2]
+
+    helpers.add_location('Mendoza2', -32.89, -68.86)
+    response = client.get(f'/location/api?zoom=6&bbox={bbox}')
+    assert _get_counts(response) == [2, 3]
+
+    # high zoom levels return the locations
+    response = client.get(f'/location/api?zoom=14&bbox={bbox}')
+    assert len(_get_names(response)) == 5
+
+    response = client.get('/location/api?zoom=foo')
+    assert response.status_code == 400
+
+
+def test_export(client, login_root, monkeypatch):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the locations are exported
+    THEN all visible locations are streamed
+    """
+    helpers.add_location('Export', 10.5, 10.5)
+    helpers.add_location('Export own', 10.5, 10.5, published=False)
+    helpers.add_location('Export foreign', 10.5, 10.5, published=False,
+                         owner_id=1)
+
+    response = client.get('/location/export')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/json'
+    names = _get_names(response)
+    assert {'Export', 'Export own'} <= names
+    assert 'Export foreign' not in names
+
+    response = client.get('/location/export/urbex')
+    assert 'Export' not in _get_names(response)
+
+    monkeypatch.setattr('app.routes.location.EXPORT_BATCH_SIZE', 2)
+    response = client.get('/location/export')
+    assert {'Export', 'Export own'} <= _get_names(response)
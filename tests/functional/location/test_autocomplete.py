@@ -0,0 +1,77 @@
+"""Functional tests for the search box suggestions."""
+import json
+import time
+import threading
+import tests.helpers as helpers
+from app.database import db
+from app.models.autocomplete import Autocomplete
+from app.models.location import Category
+from app.models.user import User
+
+
+def _get_names(client, prefix):
+    response = client.get(f'/location/autocomplete?q={prefix}')
+    assert response.status_code == 200
+    return [item['name'] for item in json.loads(response.data)]
+
+
+def test_autocomplete(client, login_root):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the suggestions are requested
+    THEN names of visible locations and categories are returned
+    """
+    location = helpers.add_location('Zlatý důl', 50.1, 15.1)
+    helpers.add_location('Zlatá štola', 50.1, 15.1, published=False)
+    helpers.add_location('Zlatá jáma', 50.1, 15.1, published=False,
+                         owner_id=1)
+    Category.create(name='Zlaté doly', owner_id=0)
+    db.session.commit()
+
+    assert _get_names(client, 'zlat') == ['Zlatá štola', 'Zlaté doly',
+                                          'Zlatý důl']
+    assert _get_names(client, 'DUL') == ['Zlatý důl']
+    assert _get_names(client, '') == []
+
+    location.name = 'Stříbrný důl'
+    db.session.commit()
+    assert _get_names(client, 'zlaty') == []
+    assert _get_names(client, 'stribrny d') == ['Stříbrný důl']
+
+    location.delete()
+    db.session.commit()
+    assert _get_names(client, 'stribrny') == []
+
+
+def test_autocomplete_first_build(app, client, monkeypatch):
+    """
+    GIVEN the index is not built yet
+    WHEN suggestions are requested while the first build runs
+    THEN the lookup waits for the build instead of using empty index
+    """
+    helpers.add_location('Měděný důl', 50.2, 15.2)
+    db.session.commit()
+    index = Autocomplete(60)
+    load = index._load
+    started = threading.Event()
+
+    def slow_load(*args):
+        started.set()
+        time.sleep(0.2)
+        return load(*args)
+
+    monkeypatch.setattr(index, '_load', slow_load)
+    user = User.get_by_id(0)
+
+    def build():
+        with app.app_context():
+            index.find('zlat', user)
+
+    thread = threading.Thread(target=build)
+    thread.start()
+    started.wait(timeout=5)
+    try:
+        assert [item.name for item in index.find('medeny', user)] == \
+            ['Měděný důl']
+    finally:
+        thread.join()
@@ -0,0 +1,108 @@
+"""Functional tests for the locations listings."""
+import re
+import html
+from datetime import datetime
+import tests.helpers as helpers
+from app.models.location import Location
+from app.models.user import User
+from app.models.version import _versions_cache
+
+
+def _count_queries(client, url):
+    # loads the logged in user and menu data to the per-process caches,
+    # the data versions are reloaded to not expire during the request
+    _versions_cache.clear()
+    client.get('/user/profile')
+    with helpers.count_queries() as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(queries)
+
+
+def test_listing_queries(client, login_root, subtests):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the locations listings are rendered
+    THEN the amount of database queries doesn't depend on amount of locations
+    """
+    bbox = '100,-50,110,-40'
+    urls = [f'/location/api?bbox={bbox}', '/location/browse',
+            '/location/browse/underground', '/location/mine/underground',
+            '/location/user/0', '/location/search/Loc', '/admin/locations']
+
+    helpers.add_location('Loc1', -45, 105, photo=True)
+    counts = {url: _count_queries(client, url) for url in urls}
+
+    for i in range(2, 7):
+        helpers.add_location(f'Loc{i}', -45, 105 + i/10, photo=True)
+
+    for url in urls:
+        with subtests.test(url=url):
+            assert _count_queries(client, url) == counts[url]
+
+
+def _get_page(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    page = response.data.decode()
+    ids = re.findall(r'href="/location/(\d+)" class="stretched-link"', page)
+    prev_url = re.search(r'href="([^"]*)" aria-label="Previous"', page)
+    next_url = re.search(r'href="([^"]*)" aria-label="Next"', page)
+    return ([int(i) for i in ids], html.unescape(prev_url.group(1)),
+            html.unescape(next_url.group(1)))
+
+
+def test_browse_pages(app, client, login_root):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the locations are browsed page by page forward and back
+    THEN all the locations are shown once, newest first
+    """
+    modified = datetime(2020, 1, 1)
+    for i in range(5):
+        location = helpers.add_location(f'Page{i}', 10, 10)
+        location.modified = modified
+    helpers.db.session.commit()
+
+    app.config['LOCATIONS_PER_PAGE'] = 2
+    try:
+        pages = []
+        ids, prev_url, next_url = _get_page(client, '/location/browse')
+        assert prev_url == 'None'
+        while True:
+            pages.append(ids)
+            if next_url == 'None':
+                break
+            ids, prev_url, next_url = _get_page(client, next_url)
+
+        back = len(pages) - 1
+        while prev_url != 'None':
+            ids, prev_url, _ = _get_page(client, prev_url)
+            back -= 1
+            assert ids == pages[back]
+        assert back == 0
+
+        response = client.get('/location/browse?cursor=foo')
+        assert response.status_code == 400
+
+        total = Location.filter_private(
+            Location.query, User.get_by_id(0)).count()
+        page = client.get('/location/browse').data.decode()
+        assert f'{total} results' in page
+
+        # page number links created before the keyset pagination
+        offset_pages = [_get_page(client, f'/location/browse/{i}')[0]
+                        for i in range(1, len(pages) + 1)]
+        assert offset_pages == pages
+        page = client.get('/location/browse/2').data.decode()
+        assert f'Page 2 of {len(pages)}' in page
+    finally:
+        app.config['LOCATIONS_PER_PAGE'] = 16
+
+    assert all(len(ids) == 2 for ids in pages[:-1])
+    ids = [i for ids in pages for i in ids]
+    assert len(ids) == len(set(ids))
+    query = Location.filter_private(Location.query, User.get_by_id(0))
+    expected = query.order_by(Location.modified.desc(),
+                              Location.id.desc()).all()
+    assert ids == [location.id for location in expected]
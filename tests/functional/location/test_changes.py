@@ -0,0 +1,81 @@
+"""Functional tests for the locations synchronization API."""
+import json
+import tests.helpers as helpers
+
+
+def _sync(client, cursor=None):
+    """Fetches all changes since the cursor, returns changes and cursor."""
+    names = set()
+    deleted = set()
+    while True:
+        url = '/location/changes'
+        if cursor:
+            url += f'?cursor={cursor}'
+        response = client.get(url)
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        names.update(location['name'] for location in data['locations'])
+        deleted.update(data['deleted'])
+        cursor = data['cursor']
+        if not data['more']:
+            return names, deleted, cursor
+
+
+def test_changes(client, login_root):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the changes are requested with cursor from the previous sync
+    THEN only locations changed since the previous sync are returned
+    """
+    helpers.add_location('Kutna Hora', 49.95, 15.27)
+    names, deleted, cursor = _sync(client)
+    assert 'Kutna Hora' in names
+
+    assert _sync(client, cursor)[:2] == (set(), set())
+
+    first = helpers.add_location('Pribram', 49.69, 14.01)
+    helpers.add_location('Jachymov', 50.36, 12.91)
+    hidden = helpers.add_location('Secret', 50.36, 12.91, published=False,
+                                  owner_id=1)
+    names, deleted, cursor = _sync(client, cursor)
+    assert names == {'Pribram', 'Jachymov'}
+    assert deleted == {hidden.id}
+
+    response = client.get(f'/location/delete/{first.id}')
+    assert response.status_code == 302
+    assert _sync(client, cursor)[:2] == (set(), {first.id})
+
+
+def test_changes_pages(app, client, login_root):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN there are more changes than fits into single response
+    THEN the changes are returned over multiple responses
+    """
+    cursor = _sync(client)[2]
+    helpers.add_location('Stribro', 49.75, 13.00)
+    helpers.add_location('Zlate Hory', 50.26, 17.39)
+    helpers.add_location('Jilove', 49.89, 14.49)
+
+    app.config['CHANGES_PER_PAGE'] = 2
+    try:
+        response = client.get(f'/location/changes?cursor={cursor}')
+        data = json.loads(response.data)
+        assert len(data['locations']) == 2
+        assert data['more']
+
+        names = _sync(client, cursor)[0]
+    finally:
+        app.config['CHANGES_PER_PAGE'] = 500
+    assert names == {'Stribro', 'Zlate Hory', 'Jilove'}
+
+
+def test_changes_invalid_cursor(client, login_root):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the changes are requested with invalid cursor
+    THEN 400 is returned
+    """
+    for cursor in ('foo', 'WzEsMl0', 'eyJhIjoxfQ', 'WyJmb28iLDEsMV0'):
+        response = client.get(f'/location/changes?cursor={cursor}')
+        assert response.status_code == 400
@@ -0,0 +1,132 @@
+"""Functional tests for the locations filtering."""
+import json
+import tests.helpers as helpers
+from app.models.location import Location, Category, Country, LocationType, \
+    LocationFilter
+from app.models.locations.underground import UndergroundState
+from app.models.user import User
+from app.utils.geolocation import BoundingBox
+
+
+def _add_locations(longitude):
+    """Adds locations with various attributes to the area around longitude.
+
+    Returns:
+        Bounding box of the area, category and the published locations
+    """
+    category = Category.create(name='Filtered', description='Filtered',
+                               owner_id=0)
+    first = helpers.add_location('Filter1', -29, longitude)
+    second = helpers.add_location('Filter2', -29, longitude + 0.1)
+    second.country = Country.SLOVAKIA
+    second.underground.state = UndergroundState.BAD
+    third = helpers.add_location('Filter3', -29, longitude + 0.2)
+    third.categories.append(category)
+    helpers.add_location('FilterPrivate', -29, longitude + 0.3,
+                         published=False, owner_id=1)
+    helpers.db.session.commit()
+    bbox = f'{longitude - 0.5},-30,{longitude + 0.5},-28'
+    return bbox, category, first, second, third
+
+
+def _get_api(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    names = {location['name'] for location in data['locations']}
+    return names, data['facets']
+
+
+def _get_counts(facet):
+    return {option['value']: option['count'] for option in facet}
+
+
+def test_api_filter(client, login_root, subtests):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the locations are requested with filters
+    THEN only matching locations are returned together with facet counts
+    """
+    bbox, category, *_ = _add_locations(121)
+    slovakia = Country.SLOVAKIA.value
+    bad = UndergroundState.BAD.value
+
+    response = client.get(f'/location/api?bbox={bbox}')
+    assert 'facets' not in json.loads(response.data)
+
+    names, facets = _get_api(client, f'/location/api?bbox={bbox}&facets=1')
+    assert names == {'Filter1', 'Filter2', 'Filter3'}
+    assert _get_counts(facets['country']) == {
+        Country.CZECHIA.value: 2, slovakia: 1}
+    assert _get_counts(facets['category']) == {category.id: 1}
+    assert _get_counts(facets['type']) == {'underground': 3}
+    assert 'state' not in facets
+
+    tests = [
+        (f'country={slovakia}', {'Filter2'}),
+        (f'category={category.id}', {'Filter3'}),
+        (f'state={bad}', {'Filter2'}),
+        (f'state={bad}&country={Country.CZECHIA.value}', set()),
+    ]
+    for args, expected in tests:
+        with subtests.test(args=args):
+            names, facets = _get_api(
+                client,
+                f'/location/api/underground?bbox={bbox}&facets=1&{args}')
+            assert names == expected
+
+    names, facets = _get_api(
+        client,
+        f'/location/api/underground?bbox={bbox}&facets=1&state={bad}')
+    # own filter is not applied to the facet counts
+    assert _get_counts(facets['state']) == {
+        UndergroundState.UNKNOWN.value: 2, bad: 1}
+    assert _get_counts(facets['country']) == {slovakia: 1}
+
+
+def test_browse_filter(client, login_root):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the locations are browsed with filters
+    THEN only matching locations are shown
+    """
+    bbox, _, first, second, third = _add_locations(123)
+
+    response = client.get(f'/location/browse?bbox={bbox}'
+                          f'&country={Country.CZECHIA.value}')
+    assert response.status_code == 200
+    page = response.data.decode()
+    assert f'href="/location/{first.id}"' in page
+    assert f'href="/location/{second.id}"' not in page
+    assert f'href="/location/{third.id}"' in page
+
+
+def test_invalid_filter(client, login_root, subtests):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the locations are requested with invalid filters
+    THEN 400 is returned
+    """
+    urls = ['/location/browse?country=foo', '/location/browse?country=999',
+            '/location/browse?category=foo', '/location/api?state=1',
+            '/location/browse/hiking?accessibility=1',
+            '/location/api/underground?state=999']
+    for url in urls:
+        with subtests.test(url=url):
+            assert client.get(url).status_code == 400
+
+
+def test_facets_single_query(client):
+    """
+    GIVEN locations with various attributes
+    WHEN the facet counts are computed
+    THEN all of them are loaded by a single query
+    """
+    bbox, *_ = _add_locations(125)
+    user = User.get_by_id(0)
+    filters = LocationFilter(area=BoundingBox.from_str(bbox))
+
+    with helpers.count_queries() as queries:
+        facets = Location.get_facets(LocationType.UNDERGROUND, filters, user)
+    assert len(queries) == 1
+    assert sum(facets['state'].values()) == 3
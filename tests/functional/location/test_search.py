@@ -0,0 +1,115 @@
+"""Functional tests for the locations search."""
+import re
+import tests.helpers as helpers
+from app.database import db
+from app.models.location import Category
+
+
+def _search(client, string):
+    response = client.get(f'/location/search/{string}')
+    assert response.status_code == 200
+    return response.data.decode()
+
+
+def test_search(client, login_root):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the locations are searched
+    THEN the locations matching all words are returned, names first
+    """
+    helpers.add_location('Důl Jeroným', 50.15, 12.61)
+    location = helpers.add_location('Štola Krásno', 50.10, 12.77)
+    location.description = 'Near the Jeroným mine'
+    db.session.commit()
+
+    page = _search(client, 'jeronym')
+    assert 'Důl Jeroným' in page
+    assert 'Štola Krásno' in page
+    assert page.index('Důl Jeroným') < page.index('Štola Krásno')
+
+    page = _search(client, 'stola jero')
+    assert 'Štola Krásno' in page
+    assert 'Důl Jeroným' not in page
+
+    assert 'Štola Krásno' not in _search(client, '"*')
+
+
+def test_search_private(client, login_root):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the locations are searched
+    THEN private locations of other users are not found
+    """
+    helpers.add_location('Kutná Hora', 49.95, 15.26, published=False)
+    other = helpers.add_location('Hora Jakub', 49.94, 15.27,
+                                 published=False, owner_id=1)
+    other.about = 'Hidden kuttenberg adit'
+    db.session.commit()
+
+    page = _search(client, 'hora')
+    assert 'Kutná Hora' in page
+    assert 'Hora Jakub' not in page
+    assert 'Hora Jakub' not in _search(client, 'kuttenberg')
+
+
+def test_search_sync(client, login_root):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the locations or their categories are changed
+    THEN the search reflects the changes
+    """
+    location = helpers.add_location('Rudolfov', 48.99, 14.54)
+    category = Category.create(name='Silvermines', owner_id=0)
+    location.categories.append(category)
+    db.session.commit()
+    assert 'Rudolfov' in _search(client, 'silvermines')
+
+    category.name = 'Goldmines'
+    db.session.commit()
+    assert 'Rudolfov' not in _search(client, 'silvermines')
+    assert 'Rudolfov' in _search(client, 'goldmines')
+
+    location.name = 'Hodejovice'
+    location.description = 'Renamed location'
+    db.session.commit()
+    assert 'Hodejovice' in _search(client, 'hodejovice')
+    assert 'Hodejovice' not in _search(client, 'rudolfov')
+
+    category.delete()
+    db.session.commit()
+    assert 'Hodejovice' not in _search(client, 'goldmines')
+
+    location.delete()
+    db.session.commit()
+    assert 'Hodejovice' not in _search(client, 'hodejovice')
+
+
+def _get_pages(client, string):
+    with helpers.count_queries() as queries:
+        page = _search(client, string)
+    counted = any('count(' in query.lower() and 'location_search' in query
+                  for query in queries)
+    return re.search(r'Page 1 of (~?\d+)', page).group(1), counted
+
+
+def test_search_pages(app, client, login_root, monkeypatch):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the search results don't fit to single page
+    THEN the amount of pages is counted once until the locations change
+    """
+    for i in range(5):
+        helpers.add_location(f'Paged {i}', 10, 10)
+
+    monkeypatch.setitem(app.config, 'LOCATIONS_PER_PAGE', 2)
+    assert _get_pages(client, 'paged') == ('3', True)
+    assert _get_pages(client, 'paged') == ('3', False)
+
+    helpers.add_location('Paged 5', 10, 10)
+    helpers.add_location('Paged 6', 10, 10)
+    assert _get_pages(client, 'paged') == ('4', True)
+
+    monkeypatch.setattr('app.database.APPROXIMATE_COUNT_MIN', 5)
+    assert _get_pages(client, 'PAGED') == ('~4', True)
+    helpers.add_location('Paged 7', 10, 10)
+    assert _get_pages(client, 'PAGED') == ('~4', False)
@@ -0,0 +1,46 @@
+"""Functional tests for the location visits."""
+import io
+import shutil
+from PIL import Image
+import tests.helpers as helpers
+from app.models.location import Visit
+from app.models.upload import Upload, UploadState, get_full_path, \
+    image_processor
+
+
+def _photo():
+    image = io.BytesIO()
+    Image.new('RGB', (100, 100)).save(image, 'JPEG')
+    image.seek(0)
+    return (image, 'photo.jpg')
+
+
+def test_visit_photos(app, client, login_root, monkeypatch):
+    """
+    GIVEN the flask client, user is logged in, image workers are enabled
+    WHEN a visit is logged with several photos
+    THEN the visit and photos are stored together and the photos are
+        passed to the image workers at once
+    """
+    submitted = []
+    monkeypatch.setattr(image_processor, 'submit',
+                        lambda flask_app, path: submitted.append(path))
+    monkeypatch.setitem(app.config, 'IMAGE_WORKERS', 4)
+    location = helpers.add_location('Visited', -33, 129)
+    helpers.db.session.commit()
+
+    try:
+        response = client.post(f'/location/{location.id}', data={
+            'comment': 'Visited with photos', 'date': '2020-01-01',
+            'photos': [_photo(), _photo(), _photo()]})
+        assert response.status_code == 302
+
+        visit = Visit.query.filter_by(location_id=location.id).one()
+        uploads = Upload.query.filter_by(object_uuid=visit.uuid).all()
+        assert len(uploads) == 3
+        assert {upload.state for upload in uploads} == \
+            {UploadState.PROCESSING}
+        assert sorted(submitted) == sorted(upload.path for upload in uploads)
+    finally:
+        shutil.rmtree(get_full_path(f'location/{location.id}'),
+                      ignore_errors=True)
@@ -1,6 +1,15 @@
 """Generic page functionality testing."""
+import time
+import threading
 from flask import request
 from flask_login import current_user
+from sqlalchemy import update
+import tests.helpers as helpers
+from app.models.alerts import get_alerts
+from app.models.event import EventLog, UnauthorizedEvent, event_sink
+from app.models.location import Category, Bookmarks
+from app.models.user import User, last_seen_buffer
+from app.models.version import DataVersion, VERSIONS_TTL
 
 
 def test_page_not_found(client, login_root):
@@ -44,3 +53,176 @@ def test_logging(app):
     app.logger.error("foo bar")
     with open(app.config['LOGGING_LOCATION']) as f:
         assert "foo bar" in f.readlines()[-1]
+
+
+def test_alerts_cached(client, login_root):
+    """
+    GIVEN The flask client, user is logged in
+    WHEN The user visits pages repeatedly
+    THEN The alert counters are loaded only once until the data change
+    """
+    tables = ('FROM thread', 'FROM login_log', 'FROM event_log',
+              'location.created >')
+
+    def count_alert_queries():
+        with helpers.count_queries() as queries:
+            assert client.get('/user/profile').status_code == 200
+        return len([query for query in queries
+                    if any(table in query for table in tables)])
+
+    count_alert_queries()
+    assert count_alert_queries() == 0
+
+    alerts = get_alerts(User.get_by_id(0))
+    helpers.add_location('Alert', 10, 10)
+    assert count_alert_queries() != 0
+    assert get_alerts(User.get_by_id(0))['location_alerts'] == \
+        alerts['location_alerts'] + 1
+
+
+def test_menu_lists_cached(client, login_root):
+    """
+    GIVEN The flask client, user is logged in
+    WHEN The user visits pages repeatedly
+    THEN The categories and bookmarks are loaded only once until changed
+    """
+    def count_list_queries():
+        with helpers.count_queries() as queries:
+            response = client.get('/user/profile')
+        assert response.status_code == 200
+        count = len([query for query in queries
+                     if 'FROM category' in query or 'FROM bookmarks' in query])
+        return count, response.data.decode()
+
+    count_list_queries()
+    assert count_list_queries()[0] == 0
+
+    Category.create(name='Cached category', description='Cached',
+                    owner_id=0)
+    Bookmarks.create(name='Cached bookmarks', user_id=0)
+    helpers.db.session.commit()
+    count, page = count_list_queries()
+    assert count == 2
+    assert 'Cached category' in page
+    assert 'Cached bookmarks' in page
+
+
+def test_menu_lists_versioned(client, login_root):
+    """
+    GIVEN The flask client, user is logged in
+    WHEN The categories are changed by another process
+    THEN The change is shown once the data version is reloaded
+    """
+    category = Category.create(name='Versioned', description='Versioned',
+                               owner_id=0)
+    helpers.db.session.commit()
+    assert 'Versioned' in client.get('/user/profile').data.decode()
+
+    # changes of other processes are seen only through the data version
+    helpers.db.session.execute(
+        update(Category).where(Category.id == category.id).values(
+            name='Renamed'))
+    client.get('/user/profile')
+    DataVersion.increase(helpers.db.session.connection(), ['categories'])
+    helpers.db.session.commit()
+
+    time.sleep(VERSIONS_TTL)
+    assert 'Renamed' in client.get('/user/profile').data.decode()
+
+
+def test_last_seen_batched(app, client, login_root):
+    """
+    GIVEN The flask client, user is logged in
+    WHEN The user visits pages repeatedly
+    THEN The last seen time is stored once the interval passes
+    """
+    app.config['LAST_SEEN_INTERVAL'] = 60
+    try:
+        with helpers.count_queries() as queries:
+            client.get('/location/browse')
+            client.get('/location/browse')
+        assert not [query for query in queries
+                    if query.startswith('UPDATE user')]
+        assert len(last_seen_buffer) == 1
+        last_seen = current_user.last_seen
+
+        app.config['LAST_SEEN_INTERVAL'] = 0
+        with helpers.count_queries() as queries:
+            client.get('/location/browse')
+        assert len([query for query in queries
+                    if query.startswith('UPDATE user')]) == 1
+        assert len(last_seen_buffer) == 0
+        assert User.get_by_id(0).last_seen >= last_seen
+    finally:
+        app.config['LAST_SEEN_INTERVAL'] = 0
+
+
+def test_last_seen_timed(app, client, login_root):
+    """
+    GIVEN The flask client, user is logged in
+    WHEN The user visits a page and no other request follows
+    THEN The last seen time is stored once the interval passes
+    """
+    app.config['LAST_SEEN_INTERVAL'] = 0.2
+    try:
+        client.get('/location/browse')
+        assert len(last_seen_buffer) == 1
+        last_seen = current_user.last_seen
+
+        for thread in threading.enumerate():
+            if thread.name == 'last-seen-flush':
+                thread.join(timeout=5)
+        assert len(last_seen_buffer) == 0
+        helpers.db.session.expire_all()
+        assert User.get_by_id(0).last_seen == last_seen
+    finally:
+        app.config['LAST_SEEN_INTERVAL'] = 0
+
+
+def test_events_buffered(app, client, login_user, monkeypatch):
+    """
+    GIVEN The flask client, user is logged in, event sink is enabled
+    WHEN The user causes events
+    THEN The events are stored together once the sink is flushed
+    """
+    # the sink is flushed manually instead of by the background thread
+    monkeypatch.setattr(event_sink, '_start', lambda app: None)
+    app.config['EVENT_LOG_INTERVAL'] = 60
+    try:
+        with helpers.count_queries() as queries:
+            assert client.get('/admin/users').status_code == 403
+            assert client.get('/admin/locations').status_code == 403
+        assert not [query for query in queries
+                    if query.startswith('INSERT INTO event_log')]
+        assert len(event_sink) == 2
+
+        with app.app_context(), helpers.count_queries() as queries:
+            event_sink.flush()
+        assert len([query for query in queries
+                    if query.startswith('INSERT INTO event_log')]) == 1
+        assert len(event_sink) == 0
+        texts = [item.text for item in EventLog.get().limit(2)]
+        assert 'Unauthorized access of /admin/users' in texts
+        assert 'Unauthorized access of /admin/locations' in texts
+    finally:
+        app.config['EVENT_LOG_INTERVAL'] = None
+
+
+def test_events_rolled_back(app, monkeypatch):
+    """
+    GIVEN The event sink is enabled
+    WHEN An event is logged in a transaction that is rolled back
+    THEN The event is not passed to the sink
+    """
+    monkeypatch.setattr(event_sink, '_start', lambda app: None)
+    app.config['EVENT_LOG_INTERVAL'] = 60
+    try:
+        with app.test_request_context():
+            user = User.query.first()
+            EventLog.log(user, UnauthorizedEvent('/rolled/back'))
+            helpers.db.session.rollback()
+            assert len(event_sink) == 0
+            helpers.db.session.commit()
+            assert len(event_sink) == 0
+    finally:
+        app.config['EVENT_LOG_INTERVAL'] = None
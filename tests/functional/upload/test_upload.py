@@ -0,0 +1,250 @@
+"""Functional tests for serving the uploaded files."""
+import io
+import os
+import shutil
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+import pytest
+from PIL import Image
+import tests.helpers as helpers
+from app.models.upload import Upload, UploadState, ImageProcessor, \
+    get_full_path, get_srcset_attr, get_thumbnail_path, get_variant_paths, \
+    image_processor, process_upload
+from app.models.user import User, Ban
+
+PHOTO = 'test/photo.jpg'
+THUMBNAIL = 'test/thumbnail/photo.jpg'
+
+
+@pytest.fixture
+def files(app):
+    """Creates uploaded files."""
+    for path in (PHOTO, THUMBNAIL):
+        os.makedirs(os.path.dirname(get_full_path(path)), exist_ok=True)
+        with open(get_full_path(path), 'wb') as file:
+            file.write(b'image data')
+    yield
+    shutil.rmtree(get_full_path('test'))
+
+
+def test_get_logged_in(client, login_root, files):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the uploaded file is requested
+    THEN the file is sent without any database access
+    """
+    # the logged in user is cached by the first request
+    client.get(f'/upload/{PHOTO}')
+    with helpers.count_queries() as queries:
+        response = client.get(f'/upload/{PHOTO}')
+    assert response.status_code == 200
+    assert response.data == b'image data'
+    assert queries == []
+    assert response.cache_control.private
+    assert not response.cache_control.immutable
+
+
+def test_get_banned(client, login_user, files):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the user is banned
+    THEN the uploaded files are not sent anymore
+    """
+    assert client.get(f'/upload/{PHOTO}').status_code == 200
+
+    user = User.get_by_email(helpers.users['user1']['email'])
+    Ban.create(reason='Upload ban', until=datetime.utcnow() +
+               timedelta(days=1), creator_id=0, user_id=user.id)
+    helpers.db.session.commit()
+
+    assert client.get(f'/upload/{PHOTO}').status_code == 401
+
+
+def test_get_thumbnail(app, client, login_root, files):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the thumbnail is requested
+    THEN the thumbnail is cached by browser for a long time
+    """
+    response = client.get(f'/upload/{THUMBNAIL}')
+    assert response.status_code == 200
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == app.config['THUMBNAIL_MAX_AGE']
+
+
+def test_get_anonymous(client, files):
+    """
+    GIVEN the flask client, user is not logged in
+    WHEN the uploaded file is requested
+    THEN the access is denied
+    """
+    assert client.get(f'/upload/{PHOTO}').status_code == 401
+    assert client.get(f'/upload/{THUMBNAIL}').status_code == 401
+
+
+def test_get_variant(app, client, login_root, files):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the thumbnail is requested by browser accepting WebP
+    THEN the WebP variant is sent
+    """
+    with open(get_full_path(THUMBNAIL + '.webp'), 'wb') as file:
+        file.write(b'webp data')
+
+    response = client.get(f'/upload/{THUMBNAIL}',
+                          headers={'Accept': 'image/webp,*/*;q=0.8'})
+    assert response.data == b'webp data'
+    assert response.mimetype == 'image/webp'
+    assert 'Accept' in response.vary
+
+    for accept in ('image/png,*/*;q=0.8', 'image/webp;q=0'):
+        response = client.get(f'/upload/{THUMBNAIL}',
+                              headers={'Accept': accept})
+        assert response.data == b'image data'
+        assert 'Accept' in response.vary
+
+
+def test_get_accel_redirect(app, client, login_root, files):
+    """
+    GIVEN the flask client, user is logged in, nginx offload is enabled
+    WHEN the uploaded file is requested
+    THEN the file is left to be sent by nginx
+    """
+    app.config['UPLOAD_ACCEL_REDIRECT'] = '/internal/uploads/'
+    try:
+        response = client.get(f'/upload/{THUMBNAIL}')
+        assert response.status_code == 200
+        assert response.data == b''
+        assert response.headers['X-Accel-Redirect'] == \
+            f'/internal/uploads/{THUMBNAIL}'
+        assert response.cache_control.immutable
+
+        assert client.get('/upload/../config.py').status_code == 404
+    finally:
+        app.config['UPLOAD_ACCEL_REDIRECT'] = None
+
+
+def test_get_processing(app, client, login_root):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN thumbnail of an image still being processed is requested
+    THEN a placeholder is sent and not cached
+    """
+    response = client.get('/upload/test/thumbnail/missing.jpg')
+    assert response.status_code == 200
+    assert response.mimetype == 'image/png'
+    assert response.cache_control.no_cache
+    assert client.get('/upload/test/missing.jpg').status_code == 404
+
+
+def test_get_thumbnail_size(app, client, login_root, files):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN thumbnail of a size not created yet for the image is requested
+    THEN the default thumbnail is sent and not cached
+    """
+    with app.test_request_context():
+        assert get_thumbnail_path(PHOTO) == THUMBNAIL
+        assert get_thumbnail_path(PHOTO, 200) == 'test/thumbnail/256/photo.jpg'
+        assert get_thumbnail_path(PHOTO, 5000) == \
+            'test/thumbnail/1024/photo.jpg'
+        assert get_srcset_attr(PHOTO) == \
+            '/upload/test/thumbnail/256/photo.jpg 256w, ' \
+            '/upload/test/thumbnail/photo.jpg 512w, ' \
+            '/upload/test/thumbnail/1024/photo.jpg 1024w'
+
+    response = client.get('/upload/test/thumbnail/256/photo.jpg')
+    assert response.status_code == 200
+    assert response.data == b'image data'
+    assert response.cache_control.no_cache
+
+
+def test_photo_processed_in_background(app, client, login_root, monkeypatch):
+    """
+    GIVEN the flask client, user is logged in, image workers are enabled
+    WHEN a photo is uploaded
+    THEN the original is stored and processed once the upload is commited
+    """
+    submitted = []
+    monkeypatch.setattr(image_processor, 'submit',
+                        lambda flask_app, path: submitted.append(path))
+    monkeypatch.setitem(app.config, 'IMAGE_WORKERS', 2)
+    location = helpers.add_location('Processed', -31, 127)
+    helpers.db.session.commit()
+    image = io.BytesIO()
+    Image.new('RGB', (4000, 1000)).save(image, 'JPEG')
+    image.seek(0)
+
+    try:
+        response = client.post(
+            f'/upload/photo/add/location/{location.id}',
+            data={'name': 'Processed', 'taken_on': '2020-01-01',
+                  'file': (image, 'photo.jpg')})
+        assert response.status_code == 302
+
+        upload = Upload.query.filter_by(name='Processed').one()
+        assert upload.state == UploadState.PROCESSING
+        assert submitted == [upload.path]
+        assert not os.path.exists(get_full_path(upload.thumbnail))
+        with Image.open(get_full_path(upload.path)) as stored:
+            assert stored.size == (4000, 1000)
+
+        with app.test_request_context():
+            process_upload(upload.path)
+        with Image.open(get_full_path(upload.path)) as stored:
+            assert max(stored.size) == app.config['IMAGE_MAX_SIZE_PX']
+        with Image.open(get_full_path(upload.thumbnail)) as stored:
+            assert stored.width == app.config['THUMBNAIL_SIZE_PX']
+        for thumbnail, size in upload.srcset:
+            with Image.open(get_full_path(thumbnail)) as stored:
+                assert stored.width == size
+            for variant in get_variant_paths(thumbnail):
+                with Image.open(get_full_path(variant)) as stored:
+                    assert stored.width == size
+    finally:
+        shutil.rmtree(get_full_path(f'location/{location.id}'),
+                      ignore_errors=True)
+
+
+def test_photo_processed_broken_pool(app, client, login_root, monkeypatch):
+    """
+    GIVEN the flask client, user is logged in, a worker of the image
+        processing pool was killed
+    WHEN a photo is uploaded
+    THEN the pool is restarted and the photo is processed
+    """
+    finished = []
+    monkeypatch.setattr(ImageProcessor, '_finish', staticmethod(
+        lambda flask_app, path, future: finished.append(
+            (path, future.exception()))))
+    monkeypatch.setitem(app.config, 'IMAGE_WORKERS', 1)
+    location = helpers.add_location('Broken pool', -32, 128)
+    helpers.db.session.commit()
+    image = io.BytesIO()
+    Image.new('RGB', (4000, 1000)).save(image, 'JPEG')
+    image.seek(0)
+
+    image_processor._pool = ProcessPoolExecutor(
+        1, mp_context=multiprocessing.get_context('forkserver'))
+    image_processor._pid = os.getpid()
+    with pytest.raises(BrokenProcessPool):
+        image_processor._pool.submit(os._exit, 1).result()
+
+    try:
+        response = client.post(
+            f'/upload/photo/add/location/{location.id}',
+            data={'name': 'Broken pool', 'taken_on': '2020-01-01',
+                  'file': (image, 'photo.jpg')})
+        assert response.status_code == 302
+
+        upload = Upload.query.filter_by(name='Broken pool').one()
+        image_processor.shutdown()
+        assert finished == [(upload.path, None)]
+        with Image.open(get_full_path(upload.thumbnail)) as stored:
+            assert stored.width == app.config['THUMBNAIL_SIZE_PX']
+    finally:
+        image_processor.shutdown()
+        shutil.rmtree(get_full_path(f'location/{location.id}'),
+                      ignore_errors=True)
@@ -1,7 +1,8 @@
 """Functional test for user login/logout functionality."""
+from datetime import datetime, timedelta
 from flask import request
 from html5validate import validate as validate_html
-from app.models.user import LoginLog, LoginResult
+from app.models.user import LoginLog, LoginResult, User, Ban
 import tests.helpers as helpers
 
 
@@ -203,3 +204,32 @@ def test_login_next_invalid(client):
                              next='%2Ffoo')
     assert response.status_code == 404
     assert request.path == '/foo'
+
+
+def test_logged_in_user_cached(client, login_user):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN pages are visited repeatedly
+    THEN the user and his bans are loaded only once
+    """
+    client.get('/location/browse')
+    with helpers.count_queries() as queries:
+        client.get('/location/browse')
+    assert not [query for query in queries if 'FROM ban' in query]
+
+
+def test_logout_banned(client, login_user):
+    """
+    GIVEN the flask client, user is logged in
+    WHEN the user is banned
+    THEN the user is logged out on the next request
+    """
+    assert client.get('/location/browse').status_code == 200
+
+    user = User.get_by_email(helpers.users['user1']['email'])
+    Ban.create(reason='Logged in ban', until=datetime.utcnow() +
+               timedelta(days=1), creator_id=0, user_id=user.id)
+    helpers.db.session.commit()
+
+    client.get('/location/browse', follow_redirects=True)
+    assert request.path == '/user/login'
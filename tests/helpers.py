@@ -1,6 +1,15 @@
 """Helpers for testing."""
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.database import db
+from app.utils.geolocation import LatLon
 from app.models.user import UserRole, InvitationState
+from app.models.location import Location, LocationType, Country
+from app.models.upload import Upload, UploadType
+from app.models.locations.underground import Underground, UndergroundType, \
+    UndergroundState, UndergroundAccessibility
 
 users = dict(
     root={'first_name': 'Root',
@@ -129,3 +138,44 @@ def login(client, email, password, next=None):
 
 def logout(client):
     return client.get('/user/logout', follow_redirects=True)
+
+
+def add_location(name, latitude, longitude, published=True, owner_id=0,
+                 photo=False):
+    """Creates an underground location record."""
+    if photo:
+        photo = Upload(name='Title photo', type=UploadType.PHOTO,
+                       path=f'location/{name}.jpg', created_by_id=owner_id)
+    else:
+        photo = None
+    location = Location.create(
+        name=name,
+        description=f'{name} description',
+        latitude=LatLon(latitude, True),
+        longitude=LatLon(longitude, False),
+        published=published,
+        country=Country.CZECHIA,
+        owner_id=owner_id,
+        type=LocationType.UNDERGROUND,
+        underground=Underground.create(
+            type=UndergroundType.MINE,
+            state=UndergroundState.UNKNOWN,
+            accessibility=UndergroundAccessibility.INACCESSIBLE),
+        photo=photo)
+    db.session.commit()
+    return location
+
+
+@contextmanager
+def count_queries():
+    """Collects SQL statements executed within the context."""
+    queries = []
+
+    def _collect(conn, cursor, statement, *args):
+        queries.append(statement)
+
+    event.listen(Engine, 'before_cursor_execute', _collect)
+    try:
+        yield queries
+    finally:
+        event.remove(Engine, 'before_cursor_execute', _collect)
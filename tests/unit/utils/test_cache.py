@@ -0,0 +1,69 @@
+"""Unit tests for app.utils.cache."""
+from app.utils.cache import Cache
+
+
+def test_cache_get_set():
+    """Tests storing and getting of cached items."""
+    cache = Cache()
+    assert cache.get('foo') is None
+    assert cache.get('foo', 123) == 123
+
+    cache.set('foo', 'bar')
+    assert cache.get('foo') == 'bar'
+
+    cache.delete('foo')
+    assert cache.get('foo') is None
+
+    cache.set('foo', 1)
+    cache.set('bar', 2)
+    cache.clear()
+    assert cache.get('foo') is None
+    assert cache.get('bar') is None
+
+
+def test_cache_ttl(mocker):
+    """Tests the cached items expire after ttl."""
+    monotonic = mocker.patch('app.utils.cache.monotonic', return_value=100)
+    cache = Cache(ttl=10)
+    cache.set('foo', 'bar')
+
+    monotonic.return_value = 110
+    assert cache.get('foo') == 'bar'
+    monotonic.return_value = 111
+    assert cache.get('foo') is None
+
+
+def test_cache_max_size():
+    """Tests the oldest items are dropped when cache is full."""
+    cache = Cache(max_size=2)
+    cache.set('foo', 1)
+    cache.set('bar', 2)
+    cache.set('foo', 3)
+    cache.set('baz', 4)
+
+    assert cache.get('bar') is None
+    assert cache.get('foo') == 3
+    assert cache.get('baz') == 4
+
+
+def test_cache_get_or_set(mocker):
+    """Tests the value is created only when not cached."""
+    creator = mocker.Mock(return_value='bar')
+    cache = Cache()
+
+    assert cache.get_or_set('foo', creator) == 'bar'
+    assert cache.get_or_set('foo', creator) == 'bar'
+    creator.assert_called_once()
+
+
+def test_cache_delete_matching():
+    """Tests only items matching the condition are removed."""
+    cache = Cache()
+    cache.set('foo', 1)
+    cache.set('bar', 2)
+    cache.set('baz', 3)
+    cache.delete_matching(lambda key, value: key == 'foo' or value == 3)
+
+    assert cache.get('foo') is None
+    assert cache.get('bar') == 2
+    assert cache.get('baz') is None
@@ -1,7 +1,7 @@
 from unittest.mock import patch, mock_open
 from pytest import approx, raises
 from urllib.error import URLError
-from app.utils.geolocation import GeoIp, LatLon
+from app.utils.geolocation import GeoIp, LatLon, BoundingBox, ClusterGrid
 
 
 def test_geo_ip_full():
@@ -137,3 +137,73 @@ def test_latlon_str(subtests):
     for item in items:
         with subtests.test(expected=item[1]):
             assert str(item[0]) == item[1]
+
+
+def test_bounding_box(subtests):
+    """Tests the BoundingBox creation from string."""
+    valid = [
+        ('14,49.5,15.25,51', (14, 49.5, 15.25, 51), False),
+        ('170,-20,190,-10', (170, -20, -170, -10), True),
+        ('-500,-95,500,95', (-180, -90, 180, 90), False),
+    ]
+    invalid = ['foo', '1,2,3', '1,2,3,4,5', '15,49,14,51', '14,51,15,49',
+               '1,2,3,inf']
+
+    for data, edges, crosses in valid:
+        with subtests.test(data=data):
+            area = BoundingBox.from_str(data)
+            assert (area.west.value, area.south.value, area.east.value,
+                    area.north.value) == approx(edges)
+            assert area.west.is_longitude and area.east.is_longitude
+            assert area.south.is_latitude and area.north.is_latitude
+            assert area.crosses_antimeridian is crosses
+
+    for data in invalid:
+        with subtests.test(data=data):
+            with raises(ValueError):
+                BoundingBox.from_str(data)
+
+
+def test_bounding_box_contains():
+    """Tests the point in bounding box check."""
+    area = BoundingBox.from_str('14,49,15,51')
+    assert area.contains(50, 14.5)
+    assert not area.contains(48, 14.5)
+    assert not area.contains(50, 16)
+
+    area = BoundingBox.from_str('170,-20,190,-10')
+    assert area.contains(-15, 175)
+    assert area.contains(-15, -175)
+    assert not area.contains(-15, 0)
+
+
+def test_cluster_grid():
+    """Tests clustering of points to grid cells."""
+    grid = ClusterGrid(zoom=4)
+    grid.add(50.1, 14.4)
+    grid.add(50.3, 14.6)
+    grid.add(-33.9, 151.2)
+
+    clusters = sorted(grid.get_clusters(), key=lambda c: c.count)
+    assert len(clusters) == 2
+    assert clusters[0].count == 1
+    assert clusters[0].latitude == approx(-33.9)
+    assert clusters[1].count == 2
+    assert clusters[1].latitude == approx(50.2)
+    assert clusters[1].longitude == approx(14.5)
+
+    clusters = grid.get_clusters(BoundingBox.from_str('10,45,20,55'))
+    assert len(clusters) == 1
+    assert clusters[0].count == 2
+
+    # grid copy is independent on the original one
+    copy = grid.copy()
+    copy.add(-33.8, 151.1)
+    assert sorted(c.count for c in grid.get_clusters()) == [1, 2]
+    assert sorted(c.count for c in copy.get_clusters()) == [2, 2]
+
+    # locations are separated on higher zoom levels
+    grid = ClusterGrid(zoom=12)
+    grid.add(50.1, 14.4)
+    grid.add(50.3, 14.6)
+    assert len(grid.get_clusters()) == 2
@@ -0,0 +1,50 @@
+"""Unit tests for app.utils.image."""
+from PIL import Image
+import pytest
+from app.utils.image import Img, process_image
+
+
+def test_derivatives(tmp_path, mocker):
+    """Tests all sizes are made from a single draft mode decode."""
+    source = tmp_path / 'photo.jpg'
+    exif = Image.Exif()
+    exif[0x010f] = 'Camera'
+    Image.new('RGB', (4000, 3000)).save(source, exif=exif)
+
+    img = Img(str(source))
+    draft = mocker.spy(img.image, 'draft')
+    img.derivatives({str(tmp_path / 'thumbnail.jpg'): (500, 2000),
+                     str(source): (1500, 1500)})
+
+    assert draft.call_args_list[0] == mocker.call(None, (1500, 1125))
+    with Image.open(source) as image:
+        assert image.size == (1500, 1125)
+        assert image.getexif()[0x010f] == 'Camera'
+    with Image.open(tmp_path / 'thumbnail.jpg') as image:
+        assert image.size == (500, 375)
+
+
+def test_derivatives_width(tmp_path):
+    """Tests the thumbnails can be bounded by width only."""
+    source = tmp_path / 'photo.jpg'
+    Image.new('RGB', (1000, 3000)).save(source)
+
+    Img(str(source)).derivatives(
+        {str(tmp_path / 'thumbnail.jpg'): (500, 2000)})
+
+    with Image.open(tmp_path / 'thumbnail.jpg') as image:
+        assert image.size == (500, 1500)
+
+
+def test_process_image_failed(tmp_path, mocker):
+    """Tests the original is kept intact if the processing fails."""
+    source = tmp_path / 'photo.jpg'
+    Image.new('RGB', (4000, 3000)).save(source)
+    mocker.patch.object(Img, 'thumbnail', side_effect=OSError)
+
+    with pytest.raises(OSError):
+        process_image(str(source), {str(source): (1500, 1500)})
+
+    assert list(tmp_path.iterdir()) == [source]
+    with Image.open(source) as image:
+        assert image.size == (4000, 3000)
@@ -1,4 +1,5 @@
-from app.utils.pagination import Pagination
+import pytest
+from app.utils.pagination import Pagination, encode_cursor, decode_cursor
 
 
 def test_pagination_first(mocker):
@@ -49,3 +50,17 @@ def test_pagination_none(mocker):
 
     pag = Pagination(1, 0, 'foo', bar=2)
     assert not pag.show
+
+
+def test_cursor():
+    cursor = encode_cursor('2022-01-08T20:45:49.811276', 12, None)
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == ['2022-01-08T20:45:49.811276', 12, None]
+    assert decode_cursor(encode_cursor()) == []
+
+
+def test_cursor_invalid(subtests):
+    for cursor in ('', 'foo', '*', 'eyJhIjoxfQ', 'w6k'):
+        with subtests.test(cursor=cursor):
+            with pytest.raises(ValueError):
+                decode_cursor(cursor)
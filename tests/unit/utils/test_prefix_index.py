@@ -0,0 +1,35 @@
+from app.utils.prefix_index import PrefixIndex, fold
+
+
+def test_fold():
+    assert fold('Důl Jeroným') == 'dul jeronym'
+    assert fold('ŠTOLA') == 'stola'
+
+
+def test_find():
+    index = PrefixIndex([(1, 'Důl Jeroným'), (2, 'Štola Jeroným'),
+                         (3, 'Dolní štola')])
+    assert len(index) == 3
+    assert index.find('jer') == [1, 2]
+    assert index.find('STOL') == [3, 2]
+    assert index.find('dul  jer') == [1]
+    assert index.find('d') == [3, 1]
+    assert index.find('nym') == []
+    assert index.find('jer', limit=1) == [1]
+    assert index.find('jer', condition=lambda item: item != 1) == [2]
+
+
+def test_add_remove():
+    index = PrefixIndex()
+    index.add(1, 'Důl Jeroným')
+    index.add(2, 'Jeroným')
+    assert index.find('jer') == [1, 2]
+
+    index.add(1, 'Krásno')
+    assert index.find('jer') == [2]
+    assert index.find('kra') == [1]
+
+    index.remove(2)
+    index.remove(3)
+    assert index.find('jer') == []
+    assert len(index) == 1